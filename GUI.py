@@ -1,11 +1,26 @@
 import customtkinter as ctk
 import tkinter as tk
+import numpy as np
+import pandas as pd
 from tkinter import messagebox, ttk
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from methods_data_formatting import process_functions
-from methods_file_handling import file_read_df, save_as_png, load_readme_content
-from methods_general_data import show_general_data_info, show_data_structure
+from methods_background import run_in_background
+from methods_data_formatting import process_functions, clean_dataframe
+from methods_export import ExportQueue, EXPORT_FORMATS
+from methods_file_handling import (file_read_df, file_read_chunks, select_data_files, select_export_path, save_as_png,
+                                   save_sketches_as_json, load_sketches_from_json, load_readme_content, EXCEL_MAX_ROWS)
+from methods_filtering import DataFrameIndex
+from methods_geospatial import GridIndex, COORDINATES, INDEX_PRECISION, region_grid
+from methods_geospatial import METRICS as GEO_METRICS
+from methods_general_data import (show_general_data_info, show_general_data_estimates, show_data_structure,
+                                  general_data_info, fill_general_data_tree)
+from methods_sampling import StratifiedSample
+from methods_sketches import DistributionSketches, METRICS, GROUPS, sketch_chunks, percentile_margins
+from methods_templates import available_templates, load_template
+from methods_time_series import TimeSeriesAggregates, RESOLUTIONS, WEEKDAYS, downsample_minmax
+from methods_time_series import METRICS as TIME_SERIES_METRICS
+from methods_watchdog import UIStallWatchdog
 
 
 class MainApp(ctk.CTk):
@@ -29,6 +44,12 @@ class MainApp(ctk.CTk):
         self.title_font = ctk.CTkFont(family='Arial', size=18, weight="bold", slant="italic")
         self.geometry("500x600")
 
+        # Queue writing exported files in the background, shared by all windows
+        self.export_queue = ExportQueue()
+
+        # Optional watchdog of GUI freezes, switched on in the Information frame
+        self.watchdog = UIStallWatchdog(self)
+
         # Container frame for holding other frames
         container = ctk.CTkFrame(self)
         container.pack(side="top", fill="both", expand=True)
@@ -110,6 +131,8 @@ class UploadFileFrame(ctk.CTkFrame):
     and open statistics based on the uploaded data.
     """
 
+    NO_TEMPLATE = 'No template (read as text)'
+
     def __init__(self, parent, controller):
         """
         Initializes the UploadFileFrame.
@@ -121,6 +144,10 @@ class UploadFileFrame(ctk.CTkFrame):
         ctk.CTkFrame.__init__(self, parent)
         self.controller = controller
         self.df = None
+        self.df_index = None
+        self.sample = None
+        self.sample_index = None
+        self.template = None
 
         # Title label
         label = ctk.CTkLabel(self, text="FILE HANDLING OPTIONS", font=controller.title_font)
@@ -129,6 +156,13 @@ class UploadFileFrame(ctk.CTkFrame):
         # Treeview widget for displaying data structure
         self.tree = ttk.Treeview(self)
 
+        # Dataset template the uploaded file is validated with, files of other layouts can be read as text
+        self.templates = available_templates()
+        self.template_var = ctk.StringVar(value=load_template().name)
+        option_template = ctk.CTkOptionMenu(self, variable=self.template_var,
+                                            values=list(self.templates) + [self.NO_TEMPLATE])
+        option_template.pack(padx=10, pady=5)
+
         # Buttons for different operations
         button_upload = ctk.CTkButton(self, text="Upload your file",
                                       font=('Arial', 18),
@@ -154,6 +188,12 @@ class UploadFileFrame(ctk.CTkFrame):
                                                command=self.open_statistics)
         button_statistics_view.pack(padx=10, pady=5)
 
+        # Switch for working on a stratified sample instead of the full DataFrame
+        self.preview_var = ctk.BooleanVar()
+        switch_preview = ctk.CTkSwitch(self, text='Preview mode (stratified sample)',
+                                       variable=self.preview_var)
+        switch_preview.pack(padx=10, pady=5)
+
         button_back = ctk.CTkButton(self, text="Back",
                                     font=('Arial', 18),
                                     width=200, height=40,
@@ -165,9 +205,40 @@ class UploadFileFrame(ctk.CTkFrame):
 
     def upload_file(self):
         """
-        Uploads a file and reads its contents into a DataFrame.
+        Uploads a file and reads its contents into a DataFrame validated with the selected template.
+        """
+        self.template = self.templates.get(self.template_var.get())
+        self.df = file_read_df(self.template)
+        # Indexes and sample belong to the previous file and are rebuilt on demand
+        self.df_index = None
+        self.sample = None
+        self.sample_index = None
+
+    def get_df_index(self):
+        """
+        Returns the cached indexes of the uploaded DataFrame, building them on first use.
+        """
+        if self.df_index is None:
+            self.df_index = DataFrameIndex(self.df, self.template)
+        return self.df_index
+
+    def get_sample(self):
+        """
+        Returns the stratified sample of the uploaded DataFrame when preview mode is on, drawing it on first use.
+        """
+        if not self.preview_var.get():
+            return None
+        if self.sample is None:
+            self.sample = StratifiedSample(self.df, template=self.template)
+        return self.sample
+
+    def get_sample_index(self):
         """
-        self.df = file_read_df()
+        Returns the cached indexes of the stratified sample, building them on first use.
+        """
+        if self.sample_index is None:
+            self.sample_index = DataFrameIndex(self.get_sample().df, self.template)
+        return self.sample_index
 
     def show_data_structure(self):
         """
@@ -181,7 +252,7 @@ class UploadFileFrame(ctk.CTkFrame):
         """
         try:
             if self.df is not None:
-                general_data_window = GeneralDataWindow(self.controller, self.df)
+                general_data_window = GeneralDataWindow(self.controller, self.df, self.get_sample())
                 general_data_window.show_general_data_info()
             else:
                 messagebox.showinfo("Info", "Dataframe is not available. Please upload a file first.")
@@ -195,7 +266,7 @@ class UploadFileFrame(ctk.CTkFrame):
         """
         try:
             if self.df is not None:
-                CleanDataWindow(self.controller, self.df)
+                CleanDataWindow(self.controller, self.df, self.get_sample(), self.template)
             else:
                 messagebox.showinfo("Info", "Dataframe is not available. Please upload a file first.")
         except Exception as e:
@@ -208,7 +279,12 @@ class UploadFileFrame(ctk.CTkFrame):
         """
         try:
             if self.df is not None:
-                StatisticsWindow(self.controller, self.df)
+                sample = self.get_sample()
+                if sample is not None:
+                    StatisticsWindow(self.controller, sample.df, self.get_sample_index(),
+                                     sample=sample, get_full_index=self.get_df_index)
+                else:
+                    StatisticsWindow(self.controller, self.df, self.get_df_index())
             else:
                 messagebox.showinfo("Info", "Dataframe is not available. Please upload a file first.")
         except Exception as e:
@@ -216,28 +292,147 @@ class UploadFileFrame(ctk.CTkFrame):
             messagebox.showerror("Error", error_message)
 
 
+class ExportWindow(ctk.CTkToplevel):
+    """
+    Window for choosing export location and formats and following progress of every exported file.
+
+    Files are written in the background, so the user can keep working while the export is running.
+    """
+
+    def __init__(self, parent, df, export_queue):
+        """
+        Initializes the ExportWindow.
+
+        Parameters:
+        - parent: The parent widget.
+        - df: The finished DataFrame to be exported. It is shared by all formats and is not modified.
+        - export_queue: ExportQueue writing the files.
+        """
+        super().__init__(parent)
+        self.title('Export')
+        self.geometry("600x450")
+        self.df = df
+        self.export_queue = export_queue
+        self.job = None
+        self.progress_rows = {}
+
+        label = ctk.CTkLabel(self, text=f'Export {len(df)} rows. Choose location and formats of the files.')
+        label.pack(padx=20, pady=10)
+
+        # Entry and button for choosing location of the files
+        path_frame = ctk.CTkFrame(self)
+        path_frame.pack(padx=20, pady=5, fill="x")
+        self.entry_path = ctk.CTkEntry(path_frame, placeholder_text='File path without extension')
+        self.entry_path.pack(side=tk.LEFT, padx=5, pady=5, fill="x", expand=True)
+        button_browse = ctk.CTkButton(path_frame, text='Browse', width=80, command=self.browse)
+        button_browse.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Checkboxes of export formats, Excel is chosen by default when rows fit in a sheet
+        self.format_vars = {}
+        for format_name in EXPORT_FORMATS:
+            default = format_name == 'Excel (.xlsx)' and len(df) < EXCEL_MAX_ROWS
+            self.format_vars[format_name] = ctk.BooleanVar(value=default)
+            ctk.CTkCheckBox(self, text=format_name, variable=self.format_vars[format_name]).pack(padx=20, pady=5)
+
+        self.button_export = ctk.CTkButton(self, text='Export', command=self.start_export)
+        self.button_export.pack(padx=20, pady=10)
+
+        # Frame holding progress of every exported file
+        self.progress_frame = ctk.CTkFrame(self)
+        self.progress_frame.pack(padx=20, pady=5, fill="x")
+
+        # Closing the window during export hides it, files are still written
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def browse(self):
+        """
+        Prompts user for the location of exported files.
+        """
+        base_path = select_export_path()
+        if base_path:
+            self.entry_path.delete(0, tk.END)
+            self.entry_path.insert(0, base_path)
+
+    def start_export(self):
+        """
+        Queues the export of chosen formats and starts following its progress.
+        """
+        base_path = self.entry_path.get().strip()
+        format_names = [format_name for format_name, var in self.format_vars.items() if var.get()]
+        if not base_path or not format_names:
+            messagebox.showinfo("Info", "Choose file location and at least one format.", parent=self)
+            return
+        self.button_export.configure(state="disabled")
+        self.job = self.export_queue.submit(self.df, base_path, format_names)
+        for row, (format_name, path) in enumerate(self.job.targets):
+            ctk.CTkLabel(self.progress_frame, text=format_name).grid(row=row, column=0, padx=5, pady=5, sticky="w")
+            progress_bar = ctk.CTkProgressBar(self.progress_frame)
+            progress_bar.set(0)
+            progress_bar.grid(row=row, column=1, padx=5, pady=5)
+            label_status = ctk.CTkLabel(self.progress_frame, text='Queued')
+            label_status.grid(row=row, column=2, padx=5, pady=5, sticky="w")
+            self.progress_rows[path] = (progress_bar, label_status)
+        self.poll_progress()
+
+    def poll_progress(self):
+        """
+        Updates progress of every file and notifies the user once all files are finished.
+        """
+        for path, (progress, status) in self.job.snapshot().items():
+            progress_bar, label_status = self.progress_rows[path]
+            progress_bar.set(progress)
+            label_status.configure(text=status)
+        if not self.job.finished():
+            self.after(200, self.poll_progress)
+            return
+        summary = "\n".join(f"{path}: {status}" for path, (_, status) in self.job.snapshot().items())
+        messagebox.showinfo("Info", f"Export finished.\n{summary}")
+        if not self.winfo_viewable():
+            self.destroy()
+
+    def close(self):
+        """
+        Hides the window while export is running, otherwise closes it.
+        """
+        if self.job is not None and not self.job.finished():
+            self.withdraw()
+        else:
+            self.destroy()
+
+
 class GeneralDataWindow(ctk.CTkToplevel):
     """
     Window for displaying general information about a DataFrame.
 
     This window includes a Treeview widget to show information such as index,
-    column names, unique values, and null values for each column.
+    column names, unique values, and null values for each column. In preview mode
+    values are estimated from a sample until exact values are computed.
     """
 
-    def __init__(self, parent, df):
+    def __init__(self, parent, df, sample=None):
         """
         Initializes the GeneralDataWindow.
 
         Parameters:
         - parent: The parent widget.
         - df: The DataFrame for which general data is displayed.
+        - sample: StratifiedSample of the DataFrame used in preview mode, None shows exact values.
         """
         super().__init__()
         self.parent = parent
         self.df = df
+        self.sample = sample
         self.title("General Data")
         self.geometry("800x800")
 
+        # Label and button shown only for estimated values
+        if self.sample is not None:
+            self.label_preview = ctk.CTkLabel(self, text=f'Estimates from a stratified sample of {len(sample)} of '
+                                                         f'{sample.population_size} rows, 95% error bounds')
+            self.label_preview.pack(padx=20, pady=5)
+            self.button_exact = ctk.CTkButton(self, text='Compute exactly', command=self.compute_exactly)
+            self.button_exact.pack(pady=5)
+
         # Treeview widget for displaying general data information
         self.tree = ttk.Treeview(self)
         self.tree["columns"] = ("Index", "Column Names", "Unique Values", "Null Values")
@@ -254,7 +449,28 @@ class GeneralDataWindow(ctk.CTkToplevel):
         """
         Displays general data information in the Treeview.
         """
-        show_general_data_info(self.tree, self.df)
+        if self.sample is not None:
+            show_general_data_estimates(self.tree, self.sample)
+        else:
+            show_general_data_info(self.tree, self.df)
+
+    def compute_exactly(self):
+        """
+        Calculates exact general data information of the full DataFrame in the background.
+        """
+        self.button_exact.configure(state="disabled", text='Computing...')
+        run_in_background(self, lambda: general_data_info(self.df), self.show_exact_info)
+
+    def show_exact_info(self, rows):
+        """
+        Replaces estimated values with exact ones once they are computed.
+
+        Parameters:
+        - rows (list): General data information of the full DataFrame.
+        """
+        fill_general_data_tree(self.tree, rows)
+        self.label_preview.configure(text=f'Exact values of all {len(self.df)} rows')
+        self.button_exact.pack_forget()
 
 
 class CleanDataWindow(ctk.CTkToplevel):
@@ -263,22 +479,27 @@ class CleanDataWindow(ctk.CTkToplevel):
 
     This window allows users to choose options for cleaning the data, such as
     removing unnecessary columns, renaming columns, calculating distance based
-    on coordinates, adjusting values, splitting date and time columns, and
-    adding card type and industry columns.
+    on coordinates, adjusting values, splitting date and time columns,
+    adding card type and industry columns, and matching the same person across
+    name spellings and cards. In preview mode the options can be dry-run on a sample.
     """
 
-    def __init__(self, parent, df):
+    def __init__(self, parent, df, sample=None, template=None):
         """
         Initializes the CleanDataWindow.
 
         Parameters:
         - parent: The parent widget.
         - df: The DataFrame to be cleaned.
+        - sample: StratifiedSample of the DataFrame used for dry runs in preview mode.
+        - template: DatasetTemplate the DataFrame was uploaded with. Default is the Kaggle fraud transactions template.
         """
         super().__init__()
         self.title('Clean data')
-        self.geometry("600x800")
+        self.geometry("600x850")
         self.df = df
+        self.sample = sample
+        self.template = template
         self.parent = parent
 
         # Label for instructions
@@ -314,6 +535,10 @@ class CleanDataWindow(ctk.CTkToplevel):
         self.cb_card_info_expand = ctk.CTkCheckBox(self, text='Add card type and industry columns',
                                                    variable=self.cb_card_info_expand_var)
 
+        self.cb_match_entities_var = ctk.BooleanVar()
+        self.cb_match_entities = ctk.CTkCheckBox(self, text='Match persons across name spellings and cards',
+                                                 variable=self.cb_match_entities_var)
+
         # Pack widgets
         self.cb_remove_columns.pack(padx=20, pady=20)
         self.cb_update_columns.pack(padx=20, pady=20)
@@ -321,97 +546,844 @@ class CleanDataWindow(ctk.CTkToplevel):
         self.cb_process_values.pack(padx=20, pady=20)
         self.cb_split_datetime.pack(padx=20, pady=20)
         self.cb_card_info_expand.pack(padx=20, pady=20)
+        self.cb_match_entities.pack(padx=20, pady=20)
         self.button_start_clean.pack(padx=20, pady=20)
 
+        # Dry run button is available only in preview mode
+        if self.sample is not None:
+            button_dry_run = ctk.CTkButton(self, text='Dry run on sample', command=self.dry_run)
+            button_dry_run.pack(padx=20, pady=5)
+
+    def selected_options(self):
+        """
+        Collects user-selected cleaning options.
+
+        :return: dict: Checkbox values and the dataset template keyed by process_functions argument names.
+        """
+        return {
+            'cb_process_values': self.cb_process_values_var.get(),
+            'cb_remove_columns': self.cb_remove_columns_var.get(),
+            'cb_split_datetime': self.cb_split_datetime_var.get(),
+            'cb_distance': self.cb_distance_var.get(),
+            'cb_card_info_expand': self.cb_card_info_expand_var.get(),
+            'cb_update_columns': self.cb_update_columns_var.get(),
+            'cb_match_entities': self.cb_match_entities_var.get(),
+            'template': self.template
+        }
+
     def process_functions(self):
         """
-        Calls the process_functions method to clean the data based on user-selected options.
+        Calls the process_functions method in the background to clean the data based on user-selected options and
+        opens an Export window with the finished DataFrame.
+        """
+        options = self.selected_options()
+        run_in_background(self, lambda: process_functions(df=self.df, **options),
+                          lambda df: ExportWindow(self.parent, df, self.parent.export_queue))
+
+    def dry_run(self):
+        """
+        Applies selected options to a copy of the sample and shows the result without saving it.
+        """
+        try:
+            cleaned_df = clean_dataframe(self.sample.df.copy(), **self.selected_options())
+            DryRunWindow(self, cleaned_df, self.sample)
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+
+
+class DryRunWindow(ctk.CTkToplevel):
+    """
+    Window for displaying the structure of a sample cleaned in a dry run.
+    """
+
+    def __init__(self, parent, df, sample):
+        """
+        Initializes the DryRunWindow.
+
+        Parameters:
+        - parent: The parent widget.
+        - df: The cleaned sample DataFrame.
+        - sample: StratifiedSample the DataFrame was cleaned from.
         """
-        process_functions(
-            df=self.df,
-            cb_process_values=self.cb_process_values_var.get(),
-            cb_remove_columns=self.cb_remove_columns_var.get(),
-            cb_split_datetime=self.cb_split_datetime_var.get(),
-            cb_distance=self.cb_distance_var.get(),
-            cb_card_info_expand=self.cb_card_info_expand_var.get(),
-            cb_update_columns=self.cb_update_columns_var.get()
-        )
+        super().__init__(parent)
+        self.title('Dry run')
+        self.geometry("900x300")
+
+        label = ctk.CTkLabel(self, text=f'Dry run on {len(sample)} sampled rows of {sample.population_size}. '
+                                        f'Result is not saved, press "Start process" to clean all rows.')
+        label.pack(padx=20, pady=10)
+
+        # Treeview widget for displaying columns and first rows of the result
+        self.tree = ttk.Treeview(self, show="headings")
+        show_data_structure(self.tree, df)
+        self.tree.pack(expand=True, fill="both")
 
 
 class StatisticsWindow(ctk.CTkToplevel):
     """
     Window for displaying statistics options and charts based on user selections.
 
-    This window currently includes a button to open a Gender Pie Chart.
+    This window includes a filter panel that slices the DataFrame through cached indexes, a button to open a
+    Gender Pie Chart and a button to export the current slice. Every chart is generated from the current slice.
+    In preview mode charts show estimates from a sample until exact results are computed.
     """
 
-    def __init__(self, parent, df):
+    def __init__(self, parent, df, df_index, sample=None, get_full_index=None):
         """
         Initializes the StatisticsWindow.
 
         Parameters:
         - parent: The parent widget.
         - df: The DataFrame for which statistics are displayed.
+        - df_index: The DataFrameIndex built for the DataFrame.
+        - sample: StratifiedSample the DataFrame was drawn from in preview mode, None for the full DataFrame.
+        - get_full_index: Function returning the DataFrameIndex of the full DataFrame, used in preview mode.
         """
         super().__init__()
         self.title('Statistics')
-        self.geometry("500x300")
+        self.geometry("500x1000")
         self.df = df
+        self.df_index = df_index
+        self.sample = sample
+        self.get_full_index = get_full_index
+        self.slice_df = df
+        self.slice_positions = None
+        self.time_series = None
+        self.grid_indexes = {}
         self.parent = parent
 
+        # Filter panel for slicing the DataFrame
+        self.filter_panel = FilterPanel(self, df_index, command=self.apply_filter)
+        self.filter_panel.pack(padx=20, pady=10, fill="x")
+
+        # Label and button shown only for estimated results
+        if self.sample is not None:
+            self.label_preview = ctk.CTkLabel(self, text=f'Preview: estimates from a stratified sample of '
+                                                         f'{len(sample)} rows, 95% error bounds')
+            self.label_preview.pack(padx=20, pady=5)
+            self.button_exact = ctk.CTkButton(self, text='Compute exactly', command=self.compute_exactly)
+            self.button_exact.pack(pady=5)
+            self.update_row_count()
+
         # Label for statistics window
         self.label = ctk.CTkLabel(self, text='Select which chart should be opened')
-        self.label.pack(padx=20, pady=20)
+        self.label.pack(padx=20, pady=10)
 
         # Button to open the Gender Pie Chart
         button_open_gender = ctk.CTkButton(self, text="Open Pie Chart", command=self.open_gender_pie_chart)
         button_open_gender.pack(pady=10)
 
+        # Buttons to open distribution charts of the slice, of files processed in chunks or of saved sketches
+        button_open_distribution = ctk.CTkButton(self, text="Open Distribution Charts",
+                                                 command=self.open_distribution_charts)
+        button_open_distribution.pack(pady=10)
+        button_distribution_files = ctk.CTkButton(self, text="Distribution from files",
+                                                  command=self.open_distribution_from_files)
+        button_distribution_files.pack(pady=10)
+        button_load_sketches = ctk.CTkButton(self, text="Load saved sketches", command=self.open_saved_sketches)
+        button_load_sketches.pack(pady=10)
+
+        # Buttons to open time series charts of the slice
+        button_open_time_series = ctk.CTkButton(self, text="Open Time Series Chart",
+                                                command=self.open_time_series_chart)
+        button_open_time_series.pack(pady=10)
+        button_open_heatmap = ctk.CTkButton(self, text="Open Heatmap Chart", command=self.open_heatmap_chart)
+        button_open_heatmap.pack(pady=10)
+
+        # Button to open geographic heatmap of the slice
+        button_open_geo_heatmap = ctk.CTkButton(self, text="Open Geo Heatmap", command=self.open_geo_heatmap_chart)
+        button_open_geo_heatmap.pack(pady=10)
+
+        # Button to export the current slice
+        button_export = ctk.CTkButton(self, text="Export slice", command=self.export_slice)
+        button_export.pack(pady=10)
+
+    def apply_filter(self, filters):
+        """
+        Resolves the filters through the cached indexes and updates the current slice.
+
+        Parameters:
+        - filters (dict): Filter values collected by the FilterPanel.
+        """
+        try:
+            self.slice_positions = self.df_index.positions(**filters)
+            self.slice_df = self.df_index.slice(self.slice_positions)
+            self.time_series = None
+            self.grid_indexes = {}
+            self.update_row_count()
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+
+    def update_row_count(self):
+        """
+        Shows the number of rows in the current slice, estimated for the full DataFrame in preview mode.
+        """
+        if self.sample is not None:
+            estimate, margin = self.sample.estimate_count(self.slice_positions)
+            self.filter_panel.show_row_count(estimate, self.sample.population_size, margin)
+        else:
+            self.filter_panel.show_row_count(len(self.slice_df), len(self.df))
+
+    def compute_exactly(self):
+        """
+        Resolves the current filters on the full DataFrame in the background and switches to exact results.
+        """
+        filters = self.filter_panel.filters()
+
+        def resolve():
+            df_index = self.get_full_index()
+            return df_index, df_index.positions(**filters)
+
+        self.button_exact.configure(state="disabled", text='Computing...')
+        run_in_background(self, resolve, self.show_exact_results)
+
+    def show_exact_results(self, result):
+        """
+        Switches the window from the sample to the full DataFrame.
+
+        Parameters:
+        - result (tuple): DataFrameIndex of the full DataFrame and row positions of the current slice.
+        """
+        self.df_index, self.slice_positions = result
+        self.df = self.df_index.df
+        self.slice_df = self.df_index.slice(self.slice_positions)
+        self.time_series = None
+        self.grid_indexes = {}
+        self.sample = None
+        self.update_row_count()
+        self.label_preview.configure(text='Exact results on all rows')
+        self.button_exact.pack_forget()
+
     def open_gender_pie_chart(self):
         """
         Opens a Gender Pie Chart window.
         """
-        pie_chart_window = GenderPieChartWindow(self, self.df)
+        gender_column = self.df_index.template.column('gender')
+        if self.sample is not None:
+            shares = self.sample.estimate_shares(gender_column, self.slice_positions)
+        else:
+            shares = None
+        pie_chart_window = GenderPieChartWindow(self, self.slice_df, gender_column, shares)
         pie_chart_window.grab_set()
         self.wait_window(pie_chart_window)
 
+    def open_distribution_charts(self):
+        """
+        Builds distribution sketches of the current slice in the background and opens a Distribution Charts window.
+        """
+        slice_df, sample, positions = self.slice_df, self.sample, self.slice_positions
+        template = self.df_index.template
+        weights = None
+        if sample is not None:
+            weights = sample.weights if positions is None else sample.weights[positions]
+
+        def build():
+            sketches = DistributionSketches()
+            sketches.update(slice_df, weights, template)
+            # Percentiles estimated from the sample are shown with error bounds
+            margins = percentile_margins(sample, positions) if sample is not None else None
+            return sketches, margins
+
+        note = 'estimate from sample, 95% error bounds' if sample is not None else 'current slice'
+        run_in_background(self, build, lambda result: DistributionChartWindow(self, result[0], note, result[1]))
+
+    def open_distribution_from_files(self):
+        """
+        Builds distribution sketches from selected files read in chunks and opens a Distribution Charts window.
+        """
+        file_paths = select_data_files()
+        if file_paths:
+            template = self.df_index.template
+            run_in_background(self, lambda: sketch_chunks(file_read_chunks(file_paths), template),
+                              lambda sketches: DistributionChartWindow(self, sketches, f'{len(file_paths)} file(s)'))
+
+    def open_saved_sketches(self):
+        """
+        Merges selected saved sketches and opens a Distribution Charts window.
+        """
+        try:
+            saved = load_sketches_from_json()
+            if saved:
+                sketches = DistributionSketches.from_dict(saved[0])
+                for data in saved[1:]:
+                    sketches.merge(DistributionSketches.from_dict(data))
+                DistributionChartWindow(self, sketches, f'{len(saved)} saved sketch file(s)')
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+
+    def get_time_series(self):
+        """
+        Returns time series aggregates of the current slice, building them on first use. Timestamps parsed by the
+        index are reused, so dates are not parsed again.
+        """
+        if self.time_series is None:
+            if self.df_index.timestamps is None:
+                raise ValueError(f"'{self.df_index.date_column}' column not found in the DataFrame.")
+            timestamps = self.df_index.timestamps
+            weights = self.sample.weights if self.sample is not None else None
+            strata = self.sample.strata if self.sample is not None else None
+            if self.slice_positions is not None:
+                timestamps = timestamps[self.slice_positions]
+                weights = weights[self.slice_positions] if weights is not None else None
+                strata = strata[self.slice_positions] if strata is not None else None
+            template = self.df_index.template
+            amount_column, fraud_column = template.column('amount'), template.column('fraud')
+            for column in (amount_column, fraud_column):
+                if column not in self.slice_df.columns:
+                    raise ValueError(f"'{column}' column not found in the DataFrame.")
+            amounts = pd.to_numeric(self.slice_df[amount_column], errors='coerce').to_numpy(dtype=float)
+            fraud = self.slice_df[fraud_column].astype(str).to_numpy() == '1'
+            self.time_series = TimeSeriesAggregates(timestamps, amounts, fraud, weights, strata)
+        return self.time_series
+
+    def open_time_series_chart(self):
+        """
+        Opens a Time Series Chart window.
+        """
+        try:
+            TimeSeriesChartWindow(self, self.get_time_series(), self.sample)
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+
+    def open_heatmap_chart(self):
+        """
+        Opens a Heatmap Chart window.
+        """
+        try:
+            HeatmapChartWindow(self, self.get_time_series(), self.sample)
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+
+    def get_grid_index(self, coordinates):
+        """
+        Returns geographic grid index of the current slice, building it on first use.
+
+        Parameters:
+        - coordinates: 'Merchant' or 'Person', key of COORDINATES the transactions are placed by.
+        """
+        if coordinates not in self.grid_indexes:
+            weights = self.sample.weights if self.sample is not None else None
+            strata = self.sample.strata if self.sample is not None else None
+            if self.sample is not None and self.slice_positions is not None:
+                weights, strata = weights[self.slice_positions], strata[self.slice_positions]
+            self.grid_indexes[coordinates] = GridIndex.from_df(self.slice_df, coordinates, weights, strata,
+                                                               self.df_index.template)
+        return self.grid_indexes[coordinates]
+
+    def open_geo_heatmap_chart(self):
+        """
+        Opens a Geo Heatmap Chart window.
+        """
+        try:
+            GeoHeatmapChartWindow(self, self.get_grid_index, self.sample)
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+
+    def export_slice(self):
+        """
+        Opens an Export window with the current slice.
+        """
+        try:
+            if self.sample is not None:
+                messagebox.showinfo("Info", "Preview mode shows a sample. Press 'Compute exactly' before exporting.")
+                return
+            ExportWindow(self.parent, self.slice_df, self.parent.export_queue)
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+
+
+class FilterPanel(ctk.CTkFrame):
+    """
+    Panel with date range, card number, store industry and fraud filters used to slice the DataFrame.
+    """
+
+    def __init__(self, parent, df_index, command):
+        """
+        Initializes the FilterPanel.
+
+        Parameters:
+        - parent: The parent widget.
+        - df_index: The DataFrameIndex used to list available filter values.
+        - command: Function called with a dict of filter values when filters are applied or reset.
+        """
+        super().__init__(parent)
+        self.command = command
+
+        # Options of store industry and fraud are taken from the indexes
+        industries = df_index.industry_index.values() if df_index.industry_index is not None else []
+        fraud_values = df_index.fraud_index.values() if df_index.fraud_index is not None else []
+
+        self.entry_date_from = ctk.CTkEntry(self, placeholder_text='Date from (YYYY-MM-DD)')
+        self.entry_date_to = ctk.CTkEntry(self, placeholder_text='Date to (YYYY-MM-DD)')
+        self.entry_card_number = ctk.CTkEntry(self, placeholder_text='Card number')
+        self.industry_var = ctk.StringVar(value='All industries')
+        self.option_industry = ctk.CTkOptionMenu(self, variable=self.industry_var,
+                                                 values=['All industries'] + industries)
+        self.fraud_var = ctk.StringVar(value='All transactions')
+        self.option_fraud = ctk.CTkOptionMenu(self, variable=self.fraud_var,
+                                              values=['All transactions'] + fraud_values)
+
+        button_apply = ctk.CTkButton(self, text='Apply filter', command=self.apply)
+        button_reset = ctk.CTkButton(self, text='Reset filter', command=self.reset)
+        self.label_rows = ctk.CTkLabel(self, text=f'Rows in slice: {len(df_index)} of {len(df_index)}')
+
+        # Grid widgets
+        self.entry_date_from.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+        self.entry_date_to.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        self.entry_card_number.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        self.option_industry.grid(row=2, column=0, padx=5, pady=5, sticky="ew")
+        self.option_fraud.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        button_apply.grid(row=3, column=0, padx=5, pady=5)
+        button_reset.grid(row=3, column=1, padx=5, pady=5)
+        self.label_rows.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+        self.grid_columnconfigure((0, 1), weight=1)
+
+    def filters(self):
+        """
+        Collects filter values from the widgets.
+
+        :return: dict: Filter values, empty filters are None.
+        """
+        industry = self.industry_var.get()
+        fraud = self.fraud_var.get()
+        return {
+            'date_from': self.entry_date_from.get().strip() or None,
+            'date_to': self.entry_date_to.get().strip() or None,
+            'card_number': self.entry_card_number.get().strip() or None,
+            'industry': None if industry == 'All industries' else industry,
+            'fraud': None if fraud == 'All transactions' else fraud,
+        }
+
+    def apply(self):
+        """
+        Applies the current filter values.
+        """
+        self.command(self.filters())
+
+    def reset(self):
+        """
+        Clears all filters and restores the full DataFrame.
+        """
+        for entry in (self.entry_date_from, self.entry_date_to, self.entry_card_number):
+            entry.delete(0, tk.END)
+        self.industry_var.set('All industries')
+        self.fraud_var.set('All transactions')
+        self.command(self.filters())
+
+    def show_row_count(self, slice_rows, total_rows, margin=None):
+        """
+        Updates the label with the number of rows in the current slice.
+
+        Parameters:
+        - slice_rows: Number of rows in the slice.
+        - total_rows: Number of rows in the DataFrame.
+        - margin: 95% error bound when the number of rows is estimated, None for exact counts.
+        """
+        if margin is not None:
+            self.label_rows.configure(text=f'Rows in slice: ~{slice_rows:.0f} ± {margin:.0f} of {total_rows} '
+                                           f'(estimate)')
+        else:
+            self.label_rows.configure(text=f'Rows in slice: {slice_rows} of {total_rows}')
+
 
 class GenderPieChartWindow(ctk.CTkToplevel):
     """
     Window for displaying a Gender Pie Chart based on DataFrame values.
     """
 
-    def __init__(self, parent, df):
+    def __init__(self, parent, df, gender_column='gender', shares=None):
         """
         Initializes the GenderPieChartWindow.
 
         Parameters:
         - parent: The parent widget.
         - df: The DataFrame for which the pie chart is generated.
+        - gender_column: Name of the gender column resolved through the dataset template. Default is 'gender'.
+        - shares: Estimated gender shares with error bounds in preview mode, None to count the DataFrame.
         """
         super().__init__(parent)
         self.title("Gender Pie Chart")
         self.geometry("800x600")
 
         # Create Gender Pie Chart
-        gender_counts = df['gender'].value_counts()
-        labels = gender_counts.index
-        sizes = gender_counts.values
-
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=1)
+        self.fig = Figure()
+        ax = self.fig.add_subplot()
+        if shares is not None:
+            labels = [f'{value}\n{row.estimate:.1%} ± {row.margin:.1%}' for value, row in shares.iterrows()]
+            ax.pie(shares['estimate'].values, labels=labels, startangle=1)
+            ax.set_title('Estimate from sample, 95% error bounds')
+        else:
+            gender_counts = df[gender_column].value_counts()
+            labels = gender_counts.index
+            sizes = gender_counts.values
+            ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=1)
         ax.axis('equal')
 
         # Embed the chart in the Tkinter window
-        canvas = FigureCanvasTkAgg(fig, master=self)
+        canvas = FigureCanvasTkAgg(self.fig, master=self)
         canvas.draw()
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
         # Button to save the chart as PNG
-        button_save = ctk.CTkButton(self, text="Save as PNG", command=save_as_png)
+        button_save = ctk.CTkButton(self, text="Save as PNG", command=lambda: save_as_png(self.fig))
         button_save.pack(pady=10)
 
 
+class DistributionChartWindow(ctk.CTkToplevel):
+    """
+    Window for displaying histogram, box plot and percentiles of amount or distance, split by fraud and non-fraud
+    transactions. Charts are drawn from distribution sketches, so no rows are sorted or rescanned.
+    """
+
+    def __init__(self, parent, sketches, note, margins=None):
+        """
+        Initializes the DistributionChartWindow.
+
+        Parameters:
+        - parent: The parent widget.
+        - sketches: DistributionSketches the charts are drawn from.
+        - note: Text describing the data the sketches were built from.
+        - margins: Error bounds of percentiles of every metric estimated from a sample, None for exact percentiles.
+        """
+        super().__init__(parent)
+        self.title(f"Distribution Charts ({note})")
+        self.geometry("900x750")
+        self.sketches = sketches
+        self.margins = margins
+
+        # Option menu to choose the charted metric
+        self.metric_var = ctk.StringVar(value=METRICS['amt'])
+        option_metric = ctk.CTkOptionMenu(self, variable=self.metric_var, values=list(METRICS.values()),
+                                          command=lambda _: self.draw())
+        option_metric.pack(pady=10)
+
+        # Histogram and box plot embedded in the Tkinter window
+        self.fig = Figure(figsize=(9, 4.5))
+        self.ax_histogram, self.ax_box = self.fig.subplots(1, 2)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+        # Label with p50, p95 and p99 of every group
+        self.label_percentiles = ctk.CTkLabel(self, text='', font=('Courier', 14), justify="left")
+        self.label_percentiles.pack(pady=5)
+
+        # Buttons to save the chart as PNG and the sketches for merging later
+        button_save = ctk.CTkButton(self, text="Save as PNG", command=lambda: save_as_png(self.fig))
+        button_save.pack(pady=5)
+        button_save_sketches = ctk.CTkButton(self, text="Save sketches",
+                                             command=lambda: save_sketches_as_json(self.sketches))
+        button_save_sketches.pack(pady=5)
+
+        self.draw()
+
+    def draw(self):
+        """
+        Draws charts and percentiles of the selected metric.
+        """
+        metric = next(key for key, name in METRICS.items() if name == self.metric_var.get())
+        self.ax_histogram.clear()
+        self.ax_box.clear()
+
+        # Histogram shows shares within each group, long tails above p99 are cut off
+        upper = max((self.sketches.quantiles[(metric, group)].quantile(0.99) for group in GROUPS
+                     if self.sketches.quantiles[(metric, group)].count > 0), default=None)
+        for group in GROUPS:
+            edges, counts, width = self.sketches.histograms[(metric, group)].histogram(upper=upper)
+            if counts.sum() > 0:
+                self.ax_histogram.bar(edges, counts / counts.sum(), width=width, align='edge', alpha=0.5,
+                                      label=group)
+        self.ax_histogram.set_xlabel(METRICS[metric])
+        self.ax_histogram.set_ylabel('Share of transactions')
+        self.ax_histogram.legend()
+
+        boxes = [self.sketches.quantiles[(metric, group)].box_stats(group) for group in GROUPS
+                 if self.sketches.quantiles[(metric, group)].count > 0]
+        if boxes:
+            self.ax_box.bxp(boxes, showfliers=False)
+        self.ax_box.set_ylabel(METRICS[metric])
+        self.fig.tight_layout()
+        self.canvas.draw()
+
+        percentiles = self.sketches.percentiles(metric)
+        if self.margins is not None and metric in self.margins:
+            margins = self.margins[metric]
+            percentiles = pd.DataFrame({group: [f'{value:.2f} ± {margin:.2f}' for value, margin
+                                                in zip(percentiles[group], margins[group])]
+                                        for group in percentiles.columns}, index=percentiles.index)
+        else:
+            percentiles = percentiles.round(2)
+        self.label_percentiles.configure(text=percentiles.to_string())
+
+
+class TimeSeriesChartWindow(ctk.CTkToplevel):
+    """
+    Window for displaying a line chart of transaction volume, fraud rate or amount over time or by hour of day.
+    """
+
+    def __init__(self, parent, time_series, sample=None):
+        """
+        Initializes the TimeSeriesChartWindow.
+
+        Parameters:
+        - parent: The parent widget.
+        - time_series: TimeSeriesAggregates the chart is drawn from.
+        - sample: StratifiedSample the aggregates are estimated from, drawn with a 95% error band. None for exact
+          aggregates.
+        """
+        super().__init__(parent)
+        self.title("Time Series Chart (estimate from sample, 95% error band)" if sample is not None
+                   else "Time Series Chart")
+        self.geometry("900x650")
+        self.time_series = time_series
+        self.sample = sample
+
+        # Option menus to choose the metric and resolution
+        options = ctk.CTkFrame(self)
+        options.pack(pady=10)
+        self.metric_var = ctk.StringVar(value=TIME_SERIES_METRICS['volume'])
+        option_metric = ctk.CTkOptionMenu(options, variable=self.metric_var,
+                                          values=list(TIME_SERIES_METRICS.values()), command=lambda _: self.draw())
+        option_metric.pack(side=tk.LEFT, padx=5)
+        self.resolution_var = ctk.StringVar(value='Day')
+        option_resolution = ctk.CTkOptionMenu(options, variable=self.resolution_var,
+                                              values=list(RESOLUTIONS) + ['Hour of day'],
+                                              command=lambda _: self.draw())
+        option_resolution.pack(side=tk.LEFT, padx=5)
+
+        # Line chart embedded in the Tkinter window
+        self.fig = Figure(figsize=(9, 5))
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+        # Button to save the chart as PNG
+        button_save = ctk.CTkButton(self, text="Save as PNG", command=lambda: save_as_png(self.fig))
+        button_save.pack(pady=10)
+
+        self.draw()
+
+    def draw(self):
+        """
+        Draws the selected metric at the selected resolution. Long series are downsampled to keep drawing fast.
+        """
+        metric = next(key for key, name in TIME_SERIES_METRICS.items() if name == self.metric_var.get())
+        resolution = self.resolution_var.get()
+        self.ax.clear()
+        x, y = self.time_series.series(metric, resolution)
+        margins = self.time_series.margins(metric, resolution, self.sample) if self.sample is not None else None
+        if resolution == 'Hour of day':
+            self.ax.plot(x, y, marker='o')
+            self.ax.set_xticks(np.arange(24))
+        else:
+            x, y, *others = downsample_minmax(x, y, *([margins] if margins is not None else []))
+            margins = others[0] if others else None
+            self.ax.plot(x, y)
+            self.fig.autofmt_xdate()
+        if margins is not None:
+            self.ax.fill_between(x, y - margins, y + margins, alpha=0.3, label='95% error band')
+            self.ax.legend()
+        self.ax.set_xlabel(resolution)
+        self.ax.set_ylabel(self.metric_var.get())
+        self.fig.tight_layout()
+        self.canvas.draw()
+
+
+class HeatmapChartWindow(ctk.CTkToplevel):
+    """
+    Window for displaying a heatmap of transaction volume, fraud rate or amount by weekday and hour of day.
+    """
+
+    def __init__(self, parent, time_series, sample=None):
+        """
+        Initializes the HeatmapChartWindow.
+
+        Parameters:
+        - parent: The parent widget.
+        - time_series: TimeSeriesAggregates the chart is drawn from.
+        - sample: StratifiedSample the aggregates are estimated from, its error bounds can be shown instead of values.
+          None for exact aggregates.
+        """
+        super().__init__(parent)
+        self.title("Heatmap Chart (estimate from sample, 95% error bounds)" if sample is not None
+                   else "Heatmap Chart")
+        self.geometry("900x500")
+        self.time_series = time_series
+        self.sample = sample
+
+        # Option menu to choose the metric
+        self.metric_var = ctk.StringVar(value=TIME_SERIES_METRICS['volume'])
+        option_metric = ctk.CTkOptionMenu(self, variable=self.metric_var, values=list(TIME_SERIES_METRICS.values()),
+                                          command=lambda _: self.draw())
+        option_metric.pack(pady=10)
+
+        # Switch between estimated values and their error bounds
+        self.bounds_var = ctk.BooleanVar()
+        if sample is not None:
+            ctk.CTkSwitch(self, text='Show 95% error bounds', variable=self.bounds_var,
+                          command=self.draw).pack(pady=5)
+
+        # Heatmap embedded in the Tkinter window
+        self.fig = Figure(figsize=(9, 3.5))
+        self.ax = self.fig.add_subplot()
+        self.colorbar = None
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+        # Button to save the chart as PNG
+        button_save = ctk.CTkButton(self, text="Save as PNG", command=lambda: save_as_png(self.fig))
+        button_save.pack(pady=10)
+
+        self.draw()
+
+    def draw(self):
+        """
+        Draws the heatmap of the selected metric.
+        """
+        metric = next(key for key, name in TIME_SERIES_METRICS.items() if name == self.metric_var.get())
+        if self.colorbar is not None:
+            self.colorbar.remove()
+        self.ax.clear()
+        if self.bounds_var.get():
+            values = self.time_series.margins(metric, 'Weekday hour', self.sample).reshape(7, 24)
+            label = f'± {self.metric_var.get()} (95% error bound)'
+        else:
+            values, label = self.time_series.weekday_hour(metric), self.metric_var.get()
+        image = self.ax.imshow(values, aspect='auto', cmap='viridis')
+        self.colorbar = self.fig.colorbar(image, ax=self.ax, label=label)
+        self.ax.set_xticks(np.arange(24))
+        self.ax.set_yticks(np.arange(7), labels=WEEKDAYS)
+        self.ax.set_xlabel('Hour of day')
+        self.fig.tight_layout()
+        self.canvas.draw()
+
+
+class GeoHeatmapChartWindow(ctk.CTkToplevel):
+    """
+    Window for displaying a geographic heatmap of transaction volume, fraud rate or amount per grid cell.
+
+    Zooming to a region re-aggregates only the cells of the grid index that fall in the region.
+    """
+
+    def __init__(self, parent, get_grid_index, sample=None):
+        """
+        Initializes the GeoHeatmapChartWindow.
+
+        Parameters:
+        - parent: The parent widget.
+        - get_grid_index: Function returning the GridIndex of the slice for the selected coordinates.
+        - sample: StratifiedSample the cells are estimated from, its error bounds can be shown instead of values.
+          None for exact cells.
+        """
+        super().__init__(parent)
+        self.title("Geo Heatmap Chart (estimate from sample, 95% error bounds)" if sample is not None
+                   else "Geo Heatmap Chart")
+        self.geometry("900x800")
+        self.get_grid_index = get_grid_index
+        self.sample = sample
+
+        # Option menus to choose coordinates, metric and precision of cells
+        options = ctk.CTkFrame(self)
+        options.pack(pady=10)
+        self.coordinates_var = ctk.StringVar(value='Merchant')
+        ctk.CTkOptionMenu(options, variable=self.coordinates_var, values=list(COORDINATES),
+                          command=lambda _: self.draw()).grid(row=0, column=0, padx=5, pady=5)
+        self.metric_var = ctk.StringVar(value=GEO_METRICS['volume'])
+        ctk.CTkOptionMenu(options, variable=self.metric_var, values=list(GEO_METRICS.values()),
+                          command=lambda _: self.draw()).grid(row=0, column=1, padx=5, pady=5)
+        self.precision_var = ctk.StringVar(value='3')
+        ctk.CTkOptionMenu(options, variable=self.precision_var,
+                          values=[str(precision) for precision in range(1, INDEX_PRECISION + 1)],
+                          command=lambda _: self.draw()).grid(row=0, column=2, padx=5, pady=5)
+
+        # Entries of the zoomed region
+        self.entry_lat_min = ctk.CTkEntry(options, placeholder_text='Latitude from')
+        self.entry_lat_max = ctk.CTkEntry(options, placeholder_text='Latitude to')
+        self.entry_long_min = ctk.CTkEntry(options, placeholder_text='Longitude from')
+        self.entry_long_max = ctk.CTkEntry(options, placeholder_text='Longitude to')
+        for column, entry in enumerate((self.entry_lat_min, self.entry_lat_max,
+                                        self.entry_long_min, self.entry_long_max)):
+            entry.grid(row=1, column=column, padx=5, pady=5)
+        ctk.CTkButton(options, text='Zoom', command=self.draw).grid(row=2, column=1, padx=5, pady=5)
+        ctk.CTkButton(options, text='Reset zoom', command=self.reset_zoom).grid(row=2, column=2, padx=5, pady=5)
+
+        # Switch between estimated values and their error bounds
+        self.bounds_var = ctk.BooleanVar()
+        if sample is not None:
+            ctk.CTkSwitch(options, text='Show 95% error bounds', variable=self.bounds_var,
+                          command=self.draw).grid(row=2, column=3, padx=5, pady=5)
+
+        # Heatmap embedded in the Tkinter window
+        self.fig = Figure(figsize=(9, 5.5))
+        self.ax = self.fig.add_subplot()
+        self.colorbar = None
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+        # Button to save the chart as PNG
+        button_save = ctk.CTkButton(self, text="Save as PNG", command=lambda: save_as_png(self.fig))
+        button_save.pack(pady=10)
+
+        self.draw()
+
+    def zoom_range(self, entry_min, entry_max):
+        """
+        Reads a coordinate range from two entries.
+
+        :return: tuple or None: Minimal and maximal coordinate, None when both entries are empty.
+        """
+        low, high = entry_min.get().strip(), entry_max.get().strip()
+        if not low and not high:
+            return None
+        return float(low) if low else -180.0, float(high) if high else 180.0
+
+    def reset_zoom(self):
+        """
+        Clears the zoomed region and draws all cells.
+        """
+        for entry in (self.entry_lat_min, self.entry_lat_max, self.entry_long_min, self.entry_long_max):
+            entry.delete(0, tk.END)
+        self.draw()
+
+    def draw(self):
+        """
+        Draws the heatmap of the selected metric in the zoomed region.
+        """
+        try:
+            metric = next(key for key, name in GEO_METRICS.items() if name == self.metric_var.get())
+            precision = int(self.precision_var.get())
+            grid_index = self.get_grid_index(self.coordinates_var.get())
+            lat_range = self.zoom_range(self.entry_lat_min, self.entry_lat_max)
+            long_range = self.zoom_range(self.entry_long_min, self.entry_long_max)
+            region = grid_index.region(precision, lat_range, long_range)
+            label = self.metric_var.get()
+            if self.bounds_var.get():
+                region['margin'] = grid_index.margins(region, precision, metric, self.sample, lat_range, long_range)
+                metric, label = 'margin', f'± {label} (95% error bound)'
+            grid, extent = region_grid(region, precision, metric)
+        except Exception as e:
+            error_message = f"Error: {e}"
+            messagebox.showerror("Error", error_message)
+            return
+
+        if self.colorbar is not None:
+            self.colorbar.remove()
+        self.ax.clear()
+        image = self.ax.imshow(grid, origin='lower', extent=extent, aspect='auto', cmap='inferno',
+                               interpolation='nearest')
+        self.colorbar = self.fig.colorbar(image, ax=self.ax, label=label)
+        self.ax.set_xlabel('Longitude')
+        self.ax.set_ylabel('Latitude')
+        self.fig.tight_layout()
+        self.canvas.draw()
+
+
 class InfoFrame(ctk.CTkFrame):
     """
     Frame for displaying information, including a README file content.
@@ -436,6 +1408,17 @@ class InfoFrame(ctk.CTkFrame):
                                     command=lambda: controller.show_frame("MainMenuFrame"))
         button_back.pack(padx=10, pady=20)
 
+        # Switch, summary and refresh button of the GUI freeze watchdog
+        self.watchdog_var = ctk.BooleanVar()
+        switch_watchdog = ctk.CTkSwitch(self, text='UI stall watchdog', variable=self.watchdog_var,
+                                        command=self.toggle_watchdog)
+        switch_watchdog.pack(padx=10, pady=5)
+        self.watchdog_label = ctk.CTkLabel(self, text="", font=('Courier', 12), anchor='w', justify="left")
+        self.watchdog_label.pack(padx=10, pady=5)
+        button_watchdog_refresh = ctk.CTkButton(self, text="Refresh freeze summary",
+                                                command=self.show_watchdog_summary)
+        button_watchdog_refresh.pack(padx=10, pady=5)
+
         # Label to display README content
         self.stats_label = ctk.CTkLabel(self, text="", font=('Arial', 14), anchor='w', justify="left")
         self.stats_label.pack(padx=10, pady=5)
@@ -445,6 +1428,29 @@ class InfoFrame(ctk.CTkFrame):
         readme_content = self.display_readme_content(readme_file_path)
         self.stats_label.configure(text=readme_content)
 
+    def toggle_watchdog(self):
+        """
+        Starts or stops the GUI freeze watchdog.
+        """
+        if self.watchdog_var.get():
+            self.controller.watchdog.start()
+        else:
+            self.controller.watchdog.stop()
+        self.show_watchdog_summary()
+
+    def show_watchdog_summary(self):
+        """
+        Displays freezes recorded by the watchdog, grouped by the blocking function.
+        """
+        summary = self.controller.watchdog.summary()
+        if not summary:
+            self.watchdog_label.configure(text="No GUI freezes recorded.")
+            return
+        lines = [f"{'Function':<40}{'Freezes':>8}{'Total, s':>10}{'Longest, s':>12}"]
+        for function, count, total, longest in summary:
+            lines.append(f"{function:<40}{count:>8}{total:>10.2f}{longest:>12.2f}")
+        self.watchdog_label.configure(text="\n".join(lines))
+
     @staticmethod
     def display_readme_content(file_path):
         # Calls function to read readme.txt file and returns the content
@@ -0,0 +1,42 @@
+"""
+File contains functions that are responsible for:
+- Running long calculations in a background thread while the GUI stays responsive (run_in_background)
+"""
+
+import threading
+from tkinter import messagebox
+
+
+def run_in_background(widget, function, on_done, poll_ms=100):
+    """
+    Runs a function in a background thread and passes its result to a callback in the GUI thread.
+
+    Tkinter widgets may only be used from the GUI thread, so the thread is polled with widget.after() and the
+    callback is called from the event loop once the function finishes.
+
+    Parameters:
+    - widget: Any Tkinter widget used to schedule polling.
+    - function: Function without arguments to run in the background.
+    - on_done: Function called with the result of the background function.
+    - poll_ms (int): Interval in milliseconds between checks whether the thread finished. Default is 100.
+    """
+    result = {}
+
+    def worker():
+        try:
+            result['value'] = function()
+        except Exception as e:
+            result['error'] = e
+
+    def poll():
+        if thread.is_alive():
+            widget.after(poll_ms, poll)
+        elif 'error' in result:
+            error_message = f"Error: {result['error']}"
+            messagebox.showerror("Error", error_message)
+        else:
+            on_done(result['value'])
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    widget.after(poll_ms, poll)
@@ -0,0 +1,211 @@
+"""
+File contains functions that are responsible for:
+- Creating phonetic codes of names (soundex)
+- Matching the same person written with slightly different name spellings or using different cards (match_entities)
+"""
+
+import numpy as np
+import pandas as pd
+from methods_templates import load_template
+
+SOUNDEX_CODES = {letter: str(code) for code, letters in enumerate(
+    ['aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r']) for letter in letters}
+# Maximal number of candidate record pairs compared at once, limits memory used by large blocks
+MAX_BLOCK_PAIRS = 5000000
+
+
+def soundex(name):
+    """
+    Creates a 4 character Soundex phonetic code of a name, so names that sound alike share the same code.
+
+    Parameters:
+    - name (str): The name to encode.
+
+    :return: str: Soundex code (i.e. 'Smith' and 'Smyth' both return 'S530'), empty string if name has no letters.
+    """
+    letters = [letter for letter in str(name).lower() if letter in SOUNDEX_CODES]
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES[letters[0]]
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES[letter]
+        # Vowels separate equal consonant codes, 'h' and 'w' do not
+        if digit != '0' and digit != previous:
+            code += digit
+        if letter not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def name_bigrams(name):
+    """
+    Splits a name into character bigrams used for similarity comparison.
+
+    Parameters:
+    - name (str): The name to split.
+
+    :return: list: Character bigrams of the padded lowercase name.
+    """
+    padded = f' {str(name).lower()} '
+    return [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+def bigram_table(names):
+    """
+    Creates a long table of bigram counts of names, one row per name and bigram it contains.
+
+    Parameters:
+    - names (list): Names to split.
+
+    :return: pd.DataFrame: Columns 'name' (position of the name), 'bigram' and 'count'.
+    """
+    rows = [(position, bigram) for position, name in enumerate(names) for bigram in name_bigrams(name)]
+    table = pd.DataFrame(rows, columns=['name', 'bigram'])
+    return table.groupby(['name', 'bigram'], sort=False).size().rename('count').reset_index()
+
+
+def pair_similarity(table, first, second):
+    """
+    Calculates cosine similarity of bigram count vectors for the given pairs of names. Only bigrams shared by both
+    names of a pair are joined, so the cost grows with the number of pairs and not with the square of unique names.
+
+    Parameters:
+    - table (pd.DataFrame): Bigram counts of unique names the pairs refer to, created by bigram_table().
+    - first (np.ndarray): Position of the first name of every pair.
+    - second (np.ndarray): Position of the second name of every pair.
+
+    :return: np.ndarray: Similarity of every pair between 0 and 1.
+    """
+    if len(first) == 0:
+        return np.empty(0)
+    norms = np.sqrt(np.bincount(table['name'], weights=table['count'] ** 2))
+    pairs = pd.DataFrame({'first': first, 'second': second, 'pair': np.arange(len(first))})
+    shared = pairs.merge(table, left_on='first', right_on='name')
+    shared = shared.merge(table, left_on=['second', 'bigram'], right_on=['name', 'bigram'], suffixes=('', '_other'))
+    dot = np.bincount(shared['pair'], weights=shared['count'] * shared['count_other'], minlength=len(first))
+    return dot / (norms[first] * norms[second])
+
+
+def connected_components(node_count, first, second):
+    """
+    Labels connected components of a graph given as an edge list. Labels are propagated along the edges and
+    shortened by pointer jumping until they no longer change.
+
+    Parameters:
+    - node_count (int): Number of nodes in the graph.
+    - first (np.ndarray): First node of every edge.
+    - second (np.ndarray): Second node of every edge.
+
+    :return: np.ndarray: Smallest node number of the component every node belongs to.
+    """
+    labels = np.arange(node_count)
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, first, labels[second])
+        np.minimum.at(labels, second, labels[first])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def block_matches(records, first_bigrams, threshold):
+    """
+    Finds matching records inside blocks of equal Soundex code of the last name and equal date of birth. Records are
+    joined to their blocks in slices, so at most MAX_BLOCK_PAIRS candidate pairs are held at once.
+
+    Parameters:
+    - records (pd.DataFrame): Records with columns 'record', 'first' (code of the first name), 'phonetic' and 'dob'.
+    - first_bigrams (pd.DataFrame): Bigram counts of unique first names the codes refer to.
+    - threshold (float): Minimal cosine similarity of first name bigrams for records to be matched.
+
+    :return: pd.DataFrame: Columns 'record' and 'record_other' of every matched pair.
+    """
+    largest_block = records.groupby(['phonetic', 'dob'], sort=False).size().max()
+    step = max(MAX_BLOCK_PAIRS // largest_block, 1)
+    matches = []
+    for start in range(0, len(records), step):
+        pairs = records.iloc[start:start + step].merge(records, on=['phonetic', 'dob'], suffixes=('', '_other'))
+        pairs = pairs[pairs['record'] < pairs['record_other']]
+
+        # Similarity is calculated once per pair of unique first names
+        name_pairs = pairs[['first', 'first_other']].drop_duplicates()
+        name_pairs = name_pairs[name_pairs['first'] != name_pairs['first_other']]
+        name_pairs = name_pairs.assign(similarity=pair_similarity(
+            first_bigrams, name_pairs['first'].to_numpy(), name_pairs['first_other'].to_numpy()))
+        pairs = pairs.merge(name_pairs, on=['first', 'first_other'], how='left')
+        # Equal first names in the same block are always matched
+        matched = pairs[(pairs['first'] == pairs['first_other']) | (pairs['similarity'] >= threshold)]
+        matches.append(matched[['record', 'record_other']])
+    return pd.concat(matches)
+
+
+def match_entities(df, threshold=0.8, template=None):
+    """
+    Assigns a cluster ID to every transaction so that the same person is identified under slightly different name
+    spellings or across different cards.
+
+    Unique records of first name, last name and date of birth are blocked by the Soundex code of the last name and the
+    date of birth, so only records sharing both are compared. Within a block, records are matched when their first
+    names are similar, so a shared last name alone does not merge different persons. Records with an empty name or
+    date of birth are not matched and every such transaction gets its own cluster.
+
+    Parameters:
+    - df (pd.DataFrame): DataFrame containing the 'date_of_birth' role column and either the 'first_name' and
+      'last_name' role columns or the 'Name' column created by process_values.
+    - threshold (float): Minimal cosine similarity of first name bigrams for records to be matched. Default is 0.8.
+    - template (DatasetTemplate): Template of the dataset. Default is the Kaggle fraud transactions template.
+
+    :return: updated_df (pd.DataFrame): DataFrame with added 'Cluster ID' column.
+    """
+    template = template or load_template()
+    first, last, dob = (template.column(role) for role in ('first_name', 'last_name', 'date_of_birth'))
+    try:
+        if dob not in df.columns:
+            raise ValueError(f"'{dob}' column not found in the DataFrame.")
+        if first in df.columns and last in df.columns:
+            first_names, last_names = df[first], df[last]
+            position = df.columns.get_loc(last) + 1
+        elif 'Name' in df.columns:
+            split_names = df['Name'].str.rsplit(' ', n=1)
+            first_names, last_names = split_names.str[0], split_names.str[-1]
+            position = df.columns.get_loc('Name') + 1
+        else:
+            raise ValueError("Name columns not found in the DataFrame.")
+
+        # Transactions with an empty key field are left out of matching
+        valid = (first_names.notna() & last_names.notna() & df[dob].notna()).to_numpy()
+        first_codes, unique_first = pd.factorize(first_names[valid])
+        last_codes, unique_last = pd.factorize(last_names[valid])
+        dob_codes, _ = pd.factorize(df[dob][valid])
+        keys = pd.DataFrame({'first': first_codes, 'last': last_codes, 'dob': dob_codes})
+        # Transactions refer to unique records of first name, last name and date of birth by codes
+        record_codes = keys.groupby(['first', 'last', 'dob'], sort=False).ngroup().to_numpy()
+        records = keys.drop_duplicates().reset_index(drop=True)
+        records['record'] = np.arange(len(records))
+
+        # Blocks of Soundex code and date of birth, soundex is computed once per unique last name
+        phonetic_codes, _ = pd.factorize(pd.Series([soundex(name) for name in unique_last]))
+        records['phonetic'] = phonetic_codes[records['last']]
+        # Candidate pairs are built for groups of blocks holding at most MAX_BLOCK_PAIRS pairs at once
+        records = records.sort_values(['phonetic', 'dob'], kind='stable')
+        block_sizes = records.groupby(['phonetic', 'dob'], sort=False).size().to_numpy()
+        batches = np.repeat(np.cumsum(block_sizes.astype(np.int64) ** 2) // MAX_BLOCK_PAIRS, block_sizes)
+        first_bigrams = bigram_table([str(name) for name in unique_first])
+        first_records, second_records = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.intp)]
+        for _, batch in records.groupby(batches, sort=False):
+            matched = block_matches(batch, first_bigrams, threshold)
+            first_records.append(matched['record'].to_numpy())
+            second_records.append(matched['record_other'].to_numpy())
+
+        labels = connected_components(len(records), np.concatenate(first_records, dtype=np.intp),
+                                      np.concatenate(second_records, dtype=np.intp))
+        label_ids, _ = pd.factorize(labels)
+        cluster_ids = np.empty(len(df), dtype=np.int64)
+        cluster_ids[valid] = label_ids[record_codes] + 1
+        # Every unmatched transaction is a cluster of its own
+        cluster_ids[~valid] = label_ids.max(initial=-1) + 2 + np.arange(int((~valid).sum()))
+        df.insert(position, 'Cluster ID', cluster_ids)
+        return df
+    except Exception as e:
+        raise e
@@ -0,0 +1,105 @@
+"""
+File contains classes that are responsible for:
+- Writing a DataFrame to several file formats concurrently in the background (ExportQueue, ExportJob)
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from methods_file_handling import df_save_to_excel, df_save_to_csv_gz, df_save_to_parquet
+
+# Export formats, their file extensions and functions writing them
+EXPORT_FORMATS = {
+    'Excel (.xlsx)': ('.xlsx', df_save_to_excel),
+    'Compressed CSV (.csv.gz)': ('.csv.gz', df_save_to_csv_gz),
+    'Parquet (.parquet)': ('.parquet', df_save_to_parquet),
+}
+
+
+class ExportJob:
+    """
+    Export of one DataFrame snapshot to one or more target files, with progress and status of every target.
+    """
+
+    def __init__(self, targets):
+        """
+        Initializes the ExportJob.
+
+        Parameters:
+        - targets (list): Tuples of (format name, file path).
+        """
+        self.targets = targets
+        self.progress = {path: 0.0 for _, path in targets}
+        self.status = {path: 'Queued' for _, path in targets}
+        self.lock = threading.Lock()
+
+    def update(self, path, progress=None, status=None):
+        """
+        Updates progress or status of a target. Called from writer threads.
+        """
+        with self.lock:
+            if progress is not None:
+                self.progress[path] = progress
+            if status is not None:
+                self.status[path] = status
+
+    def snapshot(self):
+        """
+        Returns progress and status of every target, safe to call from the GUI thread.
+
+        :return: dict: Tuples of (progress, status) keyed by file path.
+        """
+        with self.lock:
+            return {path: (self.progress[path], self.status[path]) for path in self.progress}
+
+    def finished(self):
+        """
+        Returns True when every target is either saved or failed.
+        """
+        with self.lock:
+            return all(status == 'Saved' or status.startswith('Error') for status in self.status.values())
+
+
+class ExportQueue:
+    """
+    Queue of exports written by a pool of background threads.
+
+    Targets of a job share the same DataFrame snapshot and write it chunk by chunk, so no target makes a full copy.
+    """
+
+    def __init__(self, max_workers=3):
+        """
+        Initializes the ExportQueue.
+
+        Parameters:
+        - max_workers (int): Number of targets written at the same time. Default is 3, one per format.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+
+    def submit(self, df, base_path, format_names):
+        """
+        Queues writing of a DataFrame to every chosen format.
+
+        Parameters:
+        - df (pd.DataFrame): Snapshot of the DataFrame. It must not be modified while the export is running.
+        - base_path (str): Path of the files without extension.
+        - format_names (list): Keys of EXPORT_FORMATS.
+
+        :return: ExportJob: Job for following progress of every target.
+        """
+        targets = [(format_name, base_path + EXPORT_FORMATS[format_name][0]) for format_name in format_names]
+        job = ExportJob(targets)
+        for format_name, path in targets:
+            self.executor.submit(self._write, job, df, format_name, path)
+        return job
+
+    @staticmethod
+    def _write(job, df, format_name, path):
+        """
+        Writes one target and records its progress and result in the job.
+        """
+        job.update(path, status='Writing')
+        try:
+            EXPORT_FORMATS[format_name][1](df, path, progress=lambda share: job.update(path, progress=share))
+            job.update(path, progress=1.0, status='Saved')
+        except Exception as e:
+            job.update(path, status=f'Error: {e}')
@@ -1,20 +1,26 @@
 """
 File contains functions that are responsible for:
-- Uploading files and creating dataframe (file_read_df)
--
+- Uploading files and creating dataframe validated with a dataset template (file_read_df)
+- Reading files in chunks (file_read_chunks)
+- Saving DataFrames to .xlsx, compressed .csv and .parquet files in chunks
+- Saving and loading statistics sketches (save_sketches_as_json, load_sketches_from_json)
 """
 
+import gzip
+import json
 import pandas as pd
 from tkinter import messagebox, filedialog
-import matplotlib.pyplot as plt
 
+# Maximal number of rows in an Excel sheet, including the column names row
+EXCEL_MAX_ROWS = 1048576
 
-def file_read_df():
+
+def file_read_df(template=None):
     """
     Reads a file user uploaded and returns a DataFrame. Supported files are in .csv, .ods, .xls, .xlsx formats
 
     Parameters:
-    - None
+    - template (DatasetTemplate): Template the file is validated and converted with. None reads all values as text.
 
     Returns:
     - pd.DataFrame: The DataFrame created from the file.
@@ -25,19 +31,19 @@ def file_read_df():
         file_path = filedialog.askopenfilename()
         # Conditions of file format acceptance
         if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path)
-            return df.astype(str)
+            df = pd.read_csv(file_path, dtype=str)
         elif file_path.endswith(".ods"):
-            df = pd.read_excel(file_path, engine='odf')
-            return df.astype(str)
+            df = pd.read_excel(file_path, engine='odf', dtype=str)
         elif file_path.endswith(".xls"):
-            df = pd.read_excel(file_path, engine='xlrd')
-            return df.astype(str)
+            df = pd.read_excel(file_path, engine='xlrd', dtype=str)
         elif file_path.endswith(".xlsx"):
-            df = pd.read_excel(file_path)
-            return df.astype(str)
+            df = pd.read_excel(file_path, dtype=str)
         else:
             raise ValueError("File is not supported by the program")
+        if template is None:
+            return df.astype(str)
+        # Mismatches with the template are reported now instead of during data cleaning
+        return template.stage.apply(df)
         # Exception handling messagebox
     except Exception as e:
         error_message = f"Error: {e}"
@@ -45,41 +51,131 @@ def file_read_df():
         return None
 
 
-def df_save_to_excel(df, chunk_size=1000):
+def select_data_files():
+    """
+    Prompts user to select one or more data files.
+
+    Returns:
+    - tuple: Paths of the selected files, empty if nothing was selected.
+    """
+    return filedialog.askopenfilenames(filetypes=[("Data files", "*.csv *.ods *.xls *.xlsx")])
+
+
+def file_read_chunks(file_paths, chunk_size=100000):
+    """
+    Reads files in chunks of rows, so datasets larger than memory can be processed. Excel and ods files cannot be
+    read in parts and are returned as a single chunk.
+
+    Parameters:
+    - file_paths (list): Paths of .csv, .ods, .xls or .xlsx files.
+    - chunk_size (int): The number of rows in each chunk of .csv files. Default is 100000.
+
+    Returns:
+    - Generator of pd.DataFrame chunks with values read as text, same as file_read_df.
     """
-    Saves and updated DataFrame to an Excel file in chunks and prompts the user for the save location.
+    for file_path in file_paths:
+        if file_path.endswith(".csv"):
+            yield from pd.read_csv(file_path, dtype=str, chunksize=chunk_size)
+        elif file_path.endswith(".ods"):
+            yield pd.read_excel(file_path, engine='odf').astype(str)
+        elif file_path.endswith(".xls"):
+            yield pd.read_excel(file_path, engine='xlrd').astype(str)
+        elif file_path.endswith(".xlsx"):
+            yield pd.read_excel(file_path).astype(str)
+        else:
+            raise ValueError(f"File is not supported by the program: {file_path}")
+
+
+def df_save_to_excel(df, save_path, progress=None, chunk_size=1000):
+    """
+    Saves a DataFrame to an Excel file in chunks.
 
     Parameters:
     - df (pd.DataFrame): The DataFrame to be saved.
+    - save_path (str): Path of the .xlsx file.
+    - progress: Function called with the saved share of rows (0 to 1) after every chunk. Default is None.
     - chunk_size (int): The number of rows to save in each chunk. Default is 1000. Used to reduce time of saving files
     that have large quantity of rows.
     """
-    try:
-        # Prompt user for save location
-        save_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
-        if save_path:
-            # Create ExcelWriter
-            with pd.ExcelWriter(save_path, engine='xlsxwriter') as writer:
-                # Save the DataFrame to .xlsx file in chunks
-                for i in range(0, len(df), chunk_size):
-                    chunk = df.iloc[i:i + chunk_size]
-                    # Check if it's the first chunk and make column names row
-                    if i == 0:
-                        chunk.to_excel(writer, index=False, sheet_name='Sheet1')
-                    else:
-                        chunk.to_excel(writer, index=False, sheet_name='Sheet1', header=False, startrow=i)
-
-            messagebox.showinfo("Info", "Dataframe saved as .xlsx successfully.")
-    except Exception as e:
-        raise e
+    if len(df) >= EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel sheet holds up to {EXCEL_MAX_ROWS - 1} rows. Choose CSV or Parquet format.")
+    # Create ExcelWriter
+    with pd.ExcelWriter(save_path, engine='xlsxwriter') as writer:
+        # Save the DataFrame to .xlsx file in chunks
+        for i in range(0, max(len(df), 1), chunk_size):
+            chunk = df.iloc[i:i + chunk_size]
+            # Check if it's the first chunk and make column names row
+            if i == 0:
+                chunk.to_excel(writer, index=False, sheet_name='Sheet1')
+            else:
+                chunk.to_excel(writer, index=False, sheet_name='Sheet1', header=False, startrow=i + 1)
+            if progress is not None:
+                progress(min(i + chunk_size, len(df)) / max(len(df), 1))
+
+
+def df_save_to_csv_gz(df, save_path, progress=None, chunk_size=100000):
+    """
+    Saves a DataFrame to a gzip compressed CSV file in chunks.
 
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to be saved.
+    - save_path (str): Path of the .csv.gz file.
+    - progress: Function called with the saved share of rows (0 to 1) after every chunk. Default is None.
+    - chunk_size (int): The number of rows to save in each chunk. Default is 100000.
+    """
+    with gzip.open(save_path, 'wt', encoding='utf-8', newline='') as file:
+        for i in range(0, max(len(df), 1), chunk_size):
+            df.iloc[i:i + chunk_size].to_csv(file, index=False, header=(i == 0))
+            if progress is not None:
+                progress(min(i + chunk_size, len(df)) / max(len(df), 1))
+
+
+def df_save_to_parquet(df, save_path, progress=None, chunk_size=100000):
+    """
+    Saves a DataFrame to a Parquet file, writing every chunk as a separate row group.
 
-def save_as_png():
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to be saved.
+    - save_path (str): Path of the .parquet file.
+    - progress: Function called with the saved share of rows (0 to 1) after every chunk. Default is None.
+    - chunk_size (int): The number of rows to save in each chunk. Default is 100000.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Schema is taken from dtypes, pyarrow types object columns of an empty slice as null and rejects text chunks
+    empty_df = df.iloc[:0]
+    empty_schema = pa.Schema.from_pandas(empty_df, preserve_index=False)
+    schema = pa.schema([pa.field(field.name, pa.string()) if empty_df[column].dtype == object else field
+                        for column, field in zip(df.columns, empty_schema)], metadata=empty_schema.metadata)
+    with pq.ParquetWriter(save_path, schema, compression='snappy') as writer:
+        for i in range(0, len(df), chunk_size):
+            writer.write_table(pa.Table.from_pandas(df.iloc[i:i + chunk_size], schema=schema, preserve_index=False))
+            if progress is not None:
+                progress(min(i + chunk_size, len(df)) / len(df))
+
+
+def select_export_path():
+    """
+    Prompts user for the save location of exported files. Extension of every chosen format is added to the path.
+
+    Returns:
+    - str: Path without extension, empty if nothing was selected.
+    """
+    save_path = filedialog.asksaveasfilename(filetypes=[("All files", "*.*")])
+    # Extension typed by the user is replaced by extensions of chosen formats
+    for extension in (".xlsx", ".csv.gz", ".csv", ".parquet"):
+        if save_path.endswith(extension):
+            return save_path[:-len(extension)]
+    return save_path
+
+
+def save_as_png(fig):
     """
     Prompts user to save image file.
 
     Parameters:
-    - None
+    - fig (matplotlib.figure.Figure): The chart to save.
 
     Returns:
     - None
@@ -87,8 +183,8 @@ def save_as_png():
     # Function called in GUI when button to save graph is pressed
     file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png")])
     if file_path:
-        plt.savefig(file_path, format="png")
-        messagebox.showinfo("Info", "Pie chart saved as .png")
+        fig.savefig(file_path, format="png")
+        messagebox.showinfo("Info", "Chart saved as .png")
 
 
 def load_readme_content(file_path):
@@ -105,3 +201,33 @@ def load_readme_content(file_path):
             return file.read()
     except Exception as e:
         return f"Error loading README: {e}"
+
+
+def save_sketches_as_json(sketches):
+    """
+    Prompts user to save statistics sketches to a .json file, so they can be merged with sketches of other files
+    later.
+
+    Parameters:
+    - sketches: Sketches object providing to_dict() method.
+    """
+    file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+    if file_path:
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(sketches.to_dict(), file)
+        messagebox.showinfo("Info", "Sketches saved as .json")
+
+
+def load_sketches_from_json():
+    """
+    Prompts user to select one or more .json files with saved statistics sketches.
+
+    Returns:
+    - list: Dicts loaded from every selected file, empty if nothing was selected.
+    """
+    file_paths = filedialog.askopenfilenames(filetypes=[("JSON files", "*.json")])
+    data = []
+    for file_path in file_paths:
+        with open(file_path, "r", encoding="utf-8") as file:
+            data.append(json.load(file))
+    return data
@@ -0,0 +1,179 @@
+"""
+File contains classes and functions that are responsible for:
+- Building sorted and hashed indexes on frequently filtered columns (DataFrameIndex)
+- Resolving range and equality filters through those indexes to produce a slice of the dataset
+"""
+
+import numpy as np
+import pandas as pd
+from methods_templates import load_template
+from methods_time_series import parse_timestamps
+
+
+class SortedColumnIndex:
+    """
+    Sorted index of a single column used to resolve range filters with binary search.
+    """
+
+    def __init__(self, values):
+        """
+        Initializes the SortedColumnIndex.
+
+        Parameters:
+        - values (np.ndarray): Column values in row order. Missing values (NaN/NaT) are never matched.
+        """
+        missing = pd.isna(values)
+        valid_positions = np.flatnonzero(~missing)
+        order = np.argsort(values[valid_positions], kind='stable')
+        self.positions = valid_positions[order]
+        self.sorted_values = values[self.positions]
+
+    def range(self, low=None, high=None):
+        """
+        Returns row positions with values in the half-open interval [low, high).
+
+        Parameters:
+        - low: Lower bound (inclusive). None means unbounded.
+        - high: Upper bound (exclusive). None means unbounded.
+
+        :return: np.ndarray: Row positions matching the range, in value order.
+        """
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, side='left')
+        stop = len(self.sorted_values) if high is None else np.searchsorted(self.sorted_values, high, side='left')
+        return self.positions[start:stop]
+
+
+class HashColumnIndex:
+    """
+    Hashed index of a single column that maps every distinct value to the row positions holding it.
+    """
+
+    def __init__(self, values):
+        """
+        Initializes the HashColumnIndex.
+
+        Parameters:
+        - values (np.ndarray): Column values in row order.
+        """
+        codes, uniques = pd.factorize(values)
+        valid_positions = np.flatnonzero(codes >= 0)
+        order = valid_positions[np.argsort(codes[valid_positions], kind='stable')]
+        # Boundaries of each code group inside the sorted order
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self.positions = {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+    def values(self):
+        """
+        Returns the sorted list of distinct values held in the index.
+        """
+        return sorted(self.positions)
+
+    def equals(self, value):
+        """
+        Returns row positions holding the given value.
+
+        Parameters:
+        - value: Value to look up.
+
+        :return: np.ndarray: Row positions in ascending order.
+        """
+        return self.positions.get(value, np.empty(0, dtype=np.intp))
+
+
+class DataFrameIndex:
+    """
+    Set of cached indexes on the date, card number, store industry and fraud columns of a DataFrame. Columns are
+    resolved through the roles of the dataset template.
+
+    Indexes are built once per uploaded DataFrame. Filters are resolved through the indexes and intersected on
+    row positions, so re-filtering does not scan the whole DataFrame.
+    """
+
+    def __init__(self, df, template=None):
+        """
+        Initializes the DataFrameIndex and builds indexes for the columns present in the DataFrame.
+
+        Parameters:
+        - df (pd.DataFrame): The DataFrame to be indexed.
+        - template (DatasetTemplate): Template of the dataset. Default is the Kaggle fraud transactions template.
+        """
+        self.df = df
+        self.template = template or load_template()
+        self.date_column = self.template.column('timestamp')
+        self.card_column = self.template.column('card_number')
+        self.industry_column = self.template.column('industry')
+        self.fraud_column = self.template.column('fraud')
+        self.timestamps = None
+        self.date_index = None
+        self.card_index = None
+        self.industry_index = None
+        self.fraud_index = None
+
+        if self.date_column in df.columns:
+            # Timestamps are parsed once and reused by other statistics
+            self.timestamps = parse_timestamps(df[self.date_column])
+            self.date_index = SortedColumnIndex(self.timestamps)
+        if self.card_column in df.columns:
+            self.card_index = HashColumnIndex(df[self.card_column].to_numpy())
+        if self.industry_column in df.columns:
+            self.industry_index = HashColumnIndex(df[self.industry_column].to_numpy())
+        if self.fraud_column in df.columns:
+            self.fraud_index = HashColumnIndex(df[self.fraud_column].to_numpy())
+
+    def __len__(self):
+        return len(self.df)
+
+    def positions(self, date_from=None, date_to=None, card_number=None, industry=None, fraud=None):
+        """
+        Resolves the filters to row positions. Filters left as None or empty are not applied.
+
+        Parameters:
+        - date_from (str): First date of the slice (inclusive), e.g. '2019-01-01'.
+        - date_to (str): Last date of the slice (inclusive), e.g. '2019-03-31'.
+        - card_number (str): Card number to match.
+        - industry (str): Store industry to match.
+        - fraud (str): Fraud flag to match ('0' or '1').
+
+        :return: np.ndarray or None: Sorted row positions of the slice, None when no filter is applied.
+        """
+        candidates = []
+        if date_from or date_to:
+            if self.date_index is None:
+                raise ValueError(f"'{self.date_column}' column not found in the DataFrame.")
+            low = pd.Timestamp(date_from).to_datetime64() if date_from else None
+            # Date to is inclusive, so the upper bound is the start of the next day
+            high = (pd.Timestamp(date_to) + pd.Timedelta(days=1)).to_datetime64() if date_to else None
+            candidates.append(self.date_index.range(low, high))
+        for value, index, column in ((card_number, self.card_index, self.card_column),
+                                     (industry, self.industry_index, self.industry_column),
+                                     (fraud, self.fraud_index, self.fraud_column)):
+            if value:
+                if index is None:
+                    raise ValueError(f"'{column}' column not found in the DataFrame.")
+                candidates.append(index.equals(value))
+
+        if not candidates:
+            return None
+        # Intersect starting from the most selective filter
+        candidates.sort(key=len)
+        result = np.sort(candidates[0])
+        for positions in candidates[1:]:
+            if len(result) == 0:
+                break
+            mask = np.zeros(len(self.df), dtype=bool)
+            mask[positions] = True
+            result = result[mask[result]]
+        return result
+
+    def slice(self, positions):
+        """
+        Returns the rows of the indexed DataFrame at the given positions.
+
+        Parameters:
+        - positions (np.ndarray or None): Row positions returned by positions(). None returns the full DataFrame.
+
+        :return: pd.DataFrame: The slice of the DataFrame.
+        """
+        if positions is None:
+            return self.df
+        return self.df.iloc[positions]
@@ -2,19 +2,58 @@ from tkinter import messagebox
 import tkinter as tk
 
 
+def general_data_info(df):
+    """
+    Calculates unique and empty value counts of every DataFrame column.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to describe.
+
+    :return: list: Tuples of (index, column name, unique values count, null values count).
+    """
+    return [(idx, col, df[col].nunique(), df[col].isnull().sum()) for idx, col in enumerate(df.columns)]
+
+
+def fill_general_data_tree(tree, rows):
+    """
+    Replaces Treeview rows with general data information.
+
+    Parameters:
+    - tree (ttk.Treeview): The Treeview to fill.
+    - rows (list): Tuples of values, one per Treeview row.
+    """
+    for item in tree.get_children():
+        tree.delete(item)
+    for idx, row in enumerate(rows):
+        tree.insert("", idx, values=row)
+    tree.pack(expand=True, fill="both")
+
+
 def show_general_data_info(tree, df):
     if df is not None:
-        for item in tree.get_children():
-            tree.delete(item)
-        for idx, col in enumerate(df.columns):
-            unique_values_count = df[col].nunique()
-            null_values_count = df[col].isnull().sum()
-            tree.insert("", idx, values=(idx, col, unique_values_count, null_values_count))
-        tree.pack(expand=True, fill="both")
+        fill_general_data_tree(tree, general_data_info(df))
     else:
         messagebox.showinfo("Info", "Dataframe is not available. Please upload a file first.")
 
 
+def show_general_data_estimates(tree, sample):
+    """
+    Displays general data information estimated from a stratified sample. Unique values can only be counted as a
+    lower bound, empty values are estimated for the full DataFrame with 95% error bounds.
+
+    Parameters:
+    - tree (ttk.Treeview): The Treeview to fill.
+    - sample (StratifiedSample): The sample of the uploaded DataFrame.
+    """
+    null_counts = sample.estimate_null_counts()
+    rows = []
+    for idx, col in enumerate(sample.df.columns):
+        unique_values = f"≥ {sample.df[col].nunique()}"
+        null_values = f"~{null_counts.at[col, 'estimate']:.0f} ± {null_counts.at[col, 'margin']:.0f}"
+        rows.append((idx, col, unique_values, null_values))
+    fill_general_data_tree(tree, rows)
+
+
 def show_data_structure(tree, df):
     if df is not None:
         for item in tree.get_children():
@@ -0,0 +1,252 @@
+"""
+File contains functions and classes that are responsible for:
+- Encoding coordinates to geohash grid cells with vectorized bit operations (geohash_encode)
+- Aggregating transaction counts, fraud and amounts per grid cell (GridIndex)
+- Re-aggregating cells of a zoomed region to a lower precision without rescanning rows
+- Calculating 95% error bounds of cells estimated from a stratified sample
+"""
+
+import numpy as np
+import pandas as pd
+from methods_templates import load_template
+
+# Precision of cells kept in the index, 6 characters are cells of about 1.2 x 0.6 km
+INDEX_PRECISION = 6
+# Template roles of the coordinate columns transactions are placed by
+COORDINATES = {'Merchant': ('merchant_lat', 'merchant_long'), 'Person': ('person_lat', 'person_long')}
+METRICS = {'volume': 'Transactions', 'fraud_rate': 'Fraud rate', 'amount': 'Amount, EUR'}
+# Maximal number of grid cells drawn in a heatmap
+MAX_GRID_CELLS = 4000000
+
+
+def cell_bits(precision):
+    """
+    Returns number of latitude and longitude bits of a geohash with the given number of characters.
+
+    Parameters:
+    - precision (int): Number of geohash characters.
+
+    :return: tuple(int, int): Latitude bits and longitude bits.
+    """
+    bits = 5 * precision
+    return bits // 2, bits - bits // 2
+
+
+def geohash_encode(lat, long, precision=INDEX_PRECISION):
+    """
+    Encodes coordinates to integer geohash cells. Longitude and latitude bits are interleaved, so a cell of lower
+    precision is obtained by shifting bits of a higher precision cell.
+
+    Parameters:
+    - lat (np.ndarray): Latitudes.
+    - long (np.ndarray): Longitudes.
+    - precision (int): Number of geohash characters. Default is INDEX_PRECISION.
+
+    :return: np.ndarray: Integer cell of every coordinate, -1 for missing or invalid coordinates.
+    """
+    lat_bits, long_bits = cell_bits(precision)
+    valid = (np.abs(lat) <= 90) & (np.abs(long) <= 180)
+    lat_cells = np.clip(((np.where(valid, lat, 0) + 90) / 180 * (1 << lat_bits)).astype(np.int64),
+                        0, (1 << lat_bits) - 1)
+    long_cells = np.clip(((np.where(valid, long, 0) + 180) / 360 * (1 << long_bits)).astype(np.int64),
+                         0, (1 << long_bits) - 1)
+    cells = np.zeros(len(lat_cells), dtype=np.int64)
+    # Geohash starts with a longitude bit and alternates
+    for bit in range(long_bits):
+        cells |= ((long_cells >> (long_bits - 1 - bit)) & 1) << (5 * precision - 1 - 2 * bit)
+    for bit in range(lat_bits):
+        cells |= ((lat_cells >> (lat_bits - 1 - bit)) & 1) << (5 * precision - 2 - 2 * bit)
+    return np.where(valid, cells, -1)
+
+
+def geohash_decode(cells, precision):
+    """
+    Decodes integer geohash cells to their latitude and longitude grid numbers.
+
+    Parameters:
+    - cells (np.ndarray): Integer cells.
+    - precision (int): Number of geohash characters of the cells.
+
+    :return: tuple(np.ndarray, np.ndarray): Latitude and longitude numbers of cells counted from the south-west.
+    """
+    lat_bits, long_bits = cell_bits(precision)
+    lat_cells = np.zeros(len(cells), dtype=np.int64)
+    long_cells = np.zeros(len(cells), dtype=np.int64)
+    for bit in range(long_bits):
+        long_cells |= ((cells >> (5 * precision - 1 - 2 * bit)) & 1) << (long_bits - 1 - bit)
+    for bit in range(lat_bits):
+        lat_cells |= ((cells >> (5 * precision - 2 - 2 * bit)) & 1) << (lat_bits - 1 - bit)
+    return lat_cells, long_cells
+
+
+class GridIndex:
+    """
+    Compact index of transaction count, fraud count and amount per geohash cell of INDEX_PRECISION.
+
+    Rows are scanned once when the index is built. Heatmaps of any region and any lower precision are aggregated
+    from the cells of the index only. When the rows are a stratified sample, their stratum and cell are kept as well,
+    so 95% error bounds of cells can be calculated.
+    """
+
+    def __init__(self, lat, long, amounts, fraud, weights=None, strata=None):
+        """
+        Initializes the GridIndex.
+
+        Parameters:
+        - lat (np.ndarray): Latitude of every transaction.
+        - long (np.ndarray): Longitude of every transaction.
+        - amounts (np.ndarray): Amount of every transaction.
+        - fraud (np.ndarray): Boolean fraud flag of every transaction.
+        - weights (np.ndarray): Weight of every transaction (i.e. sample weights). Default is 1 for every row.
+        - strata (np.ndarray): Stratum of every transaction of a stratified sample. Default is None, no error bounds.
+        """
+        weights = np.ones(len(lat)) if weights is None else np.asarray(weights, dtype=float)
+        cells = geohash_encode(lat, long)
+        valid = cells >= 0
+        self.cells, codes = np.unique(cells[valid], return_inverse=True)
+        weights = weights[valid]
+        self.volume = np.bincount(codes, weights=weights, minlength=len(self.cells))
+        self.fraud = np.bincount(codes, weights=weights * np.asarray(fraud, dtype=bool)[valid],
+                                 minlength=len(self.cells))
+        self.amount = np.bincount(codes, weights=weights * np.nan_to_num(np.asarray(amounts, dtype=float)[valid]),
+                                  minlength=len(self.cells))
+
+        # Cell centers are used to select cells of a zoomed region
+        lat_bits, long_bits = cell_bits(INDEX_PRECISION)
+        lat_cells, long_cells = geohash_decode(self.cells, INDEX_PRECISION)
+        self.lat = (lat_cells + 0.5) * 180 / (1 << lat_bits) - 90
+        self.long = (long_cells + 0.5) * 360 / (1 << long_bits) - 180
+
+        # Rows of a sample are few, they are kept for error bounds
+        self.rows = None
+        if strata is not None:
+            self.rows = {'strata': np.asarray(strata)[valid], 'cells': codes,
+                         'amounts': np.nan_to_num(np.asarray(amounts, dtype=float)[valid]),
+                         'fraud': np.asarray(fraud, dtype=bool)[valid]}
+
+    @classmethod
+    def from_df(cls, df, coordinates, weights=None, strata=None, template=None):
+        """
+        Builds the GridIndex of a DataFrame with columns resolved through the roles of the dataset template.
+
+        Parameters:
+        - df (pd.DataFrame): The DataFrame of transactions.
+        - coordinates (str): 'Merchant' or 'Person', key of COORDINATES the transactions are placed by.
+        - weights (np.ndarray): Weight of every row (i.e. sample weights). Default is 1 for every row.
+        - strata (np.ndarray): Stratum of every row of a stratified sample. Default is None, no error bounds.
+        - template (DatasetTemplate): Template of the dataset. Default is the Kaggle fraud transactions template.
+
+        :return: GridIndex: The built index.
+        """
+        template = template or load_template()
+        lat_column, long_column = (template.column(role) for role in COORDINATES[coordinates])
+        columns = [lat_column, long_column, template.column('amount'), template.column('fraud')]
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"'{missing[0]}' column not found in the DataFrame.")
+        lat, long, amounts = (pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+                              for column in columns[:3])
+        return cls(lat, long, amounts, df[columns[3]].astype(str).to_numpy() == '1', weights, strata)
+
+    def _selected(self, lat_range=None, long_range=None):
+        """
+        Returns a mask of index cells with centers inside the region.
+        """
+        selected = np.ones(len(self.cells), dtype=bool)
+        if lat_range is not None:
+            selected &= (self.lat >= lat_range[0]) & (self.lat <= lat_range[1])
+        if long_range is not None:
+            selected &= (self.long >= long_range[0]) & (self.long <= long_range[1])
+        return selected
+
+    def region(self, precision, lat_range=None, long_range=None):
+        """
+        Aggregates index cells of a region to cells of the given precision.
+
+        Parameters:
+        - precision (int): Number of geohash characters of the result, not higher than INDEX_PRECISION.
+        - lat_range (tuple): Minimal and maximal latitude of the region. None includes all latitudes.
+        - long_range (tuple): Minimal and maximal longitude of the region. None includes all longitudes.
+
+        :return: pd.DataFrame: Columns 'cell', 'lat_cell', 'long_cell', 'volume', 'fraud' and 'amount' per cell.
+        """
+        if not 1 <= precision <= INDEX_PRECISION:
+            raise ValueError(f"Precision must be between 1 and {INDEX_PRECISION}.")
+        selected = self._selected(lat_range, long_range)
+
+        # Lower precision cells are prefixes of index cells
+        parents = self.cells[selected] >> (5 * (INDEX_PRECISION - precision))
+        cells, codes = np.unique(parents, return_inverse=True)
+        lat_cells, long_cells = geohash_decode(cells, precision)
+        return pd.DataFrame({
+            'cell': cells,
+            'lat_cell': lat_cells,
+            'long_cell': long_cells,
+            'volume': np.bincount(codes, weights=self.volume[selected], minlength=len(cells)),
+            'fraud': np.bincount(codes, weights=self.fraud[selected], minlength=len(cells)),
+            'amount': np.bincount(codes, weights=self.amount[selected], minlength=len(cells)),
+        })
+
+
+    def margins(self, region, precision, metric, sample, lat_range=None, long_range=None):
+        """
+        Returns 95% error bounds of a metric of region cells estimated from a stratified sample.
+
+        Parameters:
+        - region (pd.DataFrame): Cells returned by region() with the same precision.
+        - precision (int): Number of geohash characters of the region cells.
+        - metric (str): 'volume', 'fraud_rate' or 'amount'.
+        - sample (StratifiedSample): The sample the rows were drawn from.
+        - lat_range (tuple): Latitude range the region was selected with. None includes all latitudes.
+        - long_range (tuple): Longitude range the region was selected with. None includes all longitudes.
+
+        :return: np.ndarray: Error bound of every region cell.
+        """
+        if self.rows is None:
+            raise ValueError("Error bounds are available only for an index of a stratified sample.")
+        # Rows of cells outside the region count as zeros
+        inside = self._selected(lat_range, long_range)[self.rows['cells']]
+        parents = self.cells[self.rows['cells'][inside]] >> (5 * (INDEX_PRECISION - precision))
+        groups = np.searchsorted(region['cell'].to_numpy(), parents)
+        volume, fraud = region['volume'].to_numpy(), region['fraud'].to_numpy()
+        if metric == 'volume':
+            values = np.ones(len(groups))
+        elif metric == 'amount':
+            values = self.rows['amounts'][inside]
+        else:
+            # Linearized values of the fraud rate ratio estimator
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rate = np.where(volume > 0, fraud / volume, 0)
+            values = (self.rows['fraud'][inside] - rate[groups]) / volume[groups]
+        return sample.group_margins(self.rows['strata'][inside], groups, len(region), values)
+
+
+def region_grid(region, precision, metric):
+    """
+    Arranges aggregated cells of a region to a 2D grid for drawing a heatmap.
+
+    Parameters:
+    - region (pd.DataFrame): Cells returned by GridIndex.region().
+    - precision (int): Number of geohash characters of the cells.
+    - metric (str): 'volume', 'fraud_rate', 'amount' or another column of the region (i.e. 'margin').
+
+    :return: tuple(np.ndarray, list): Grid with rows from south to north, empty where there are no transactions,
+    and its extent [west, east, south, north] in degrees.
+    """
+    lat_bits, long_bits = cell_bits(precision)
+    lat_step, long_step = 180 / (1 << lat_bits), 360 / (1 << long_bits)
+    if region.empty:
+        raise ValueError("There are no transactions in the selected region.")
+    lat_min, long_min = region['lat_cell'].min(), region['long_cell'].min()
+    shape = (region['lat_cell'].max() - lat_min + 1, region['long_cell'].max() - long_min + 1)
+    if shape[0] * shape[1] > MAX_GRID_CELLS:
+        raise ValueError("Region is too large for the selected precision. Zoom in or choose a lower precision.")
+    grid = np.full(shape, np.nan)
+    if metric == 'fraud_rate':
+        values = region['fraud'] / region['volume']
+    else:
+        values = region[metric]
+    grid[region['lat_cell'] - lat_min, region['long_cell'] - long_min] = values
+    extent = [long_min * long_step - 180, (region['long_cell'].max() + 1) * long_step - 180,
+              lat_min * lat_step - 90, (region['lat_cell'].max() + 1) * lat_step - 90]
+    return grid, extent
@@ -0,0 +1,200 @@
+"""
+File contains classes that are responsible for:
+- Drawing a stratified sample of the uploaded DataFrame for preview mode (StratifiedSample)
+- Estimating counts and shares of the full DataFrame from the sample with 95% error bounds
+- Calculating 95% error bounds of estimated totals per group (i.e. per day or grid cell) and of other statistics by
+  bootstrap within strata
+"""
+
+import numpy as np
+import pandas as pd
+from methods_templates import load_template
+
+# Template roles of the columns the sample is stratified by
+STRATA_ROLES = ['fraud', 'industry']
+# Normal distribution quantile of 95% confidence interval
+CONFIDENCE_Z = 1.96
+# Number of bootstrap replicates of statistics without a closed-form error bound
+BOOTSTRAP_REPLICATES = 100
+
+
+class StratifiedSample:
+    """
+    Stratified random sample of a DataFrame kept in memory for fast previews.
+
+    Sample size of every stratum is proportional to its size in the full DataFrame, but never smaller than
+    min_per_stratum, so rare strata (i.e. fraud in a small industry) are still represented. Every sampled row carries
+    a weight of how many rows of the full DataFrame it represents.
+    """
+
+    def __init__(self, df, sample_size=50000, min_per_stratum=30, random_state=0, template=None):
+        """
+        Initializes the StratifiedSample and draws the sample.
+
+        Parameters:
+        - df (pd.DataFrame): The full DataFrame.
+        - sample_size (int): Approximate number of rows in the sample. Default is 50000.
+        - min_per_stratum (int): Minimal number of rows sampled from every stratum. Default is 30.
+        - random_state (int): Seed of the random generator so the same file produces the same sample.
+        - template (DatasetTemplate): Template of the dataset. Default is the Kaggle fraud transactions template.
+        """
+        self.population_size = len(df)
+        self.random_state = random_state
+        self.template = template or load_template()
+        strata_columns = [self.template.column(role) for role in STRATA_ROLES]
+        strata_columns = [column for column in strata_columns if column in df.columns]
+        if strata_columns:
+            # Empty values form strata of their own
+            strata = df.groupby(strata_columns, sort=False, dropna=False).ngroup().to_numpy()
+        else:
+            strata = np.zeros(len(df), dtype=np.int64)
+
+        # Proportional allocation with a minimal size per stratum
+        self.population = np.bincount(strata)
+        share = sample_size / max(len(df), 1)
+        self.sizes = np.minimum(self.population, np.maximum(np.round(self.population * share), min_per_stratum))
+        self.sizes = self.sizes.astype(np.int64)
+
+        # Random order within each stratum, first rows of every stratum are taken
+        rng = np.random.default_rng(random_state)
+        order = np.lexsort((rng.random(len(df)), strata))
+        starts = np.concatenate(([0], np.cumsum(self.population)[:-1]))
+        ranks = np.arange(len(df)) - starts[strata[order]]
+        positions = np.sort(order[ranks < self.sizes[strata[order]]])
+
+        self.df = df.iloc[positions]
+        self.strata = strata[positions]
+        self.weights = self.population[self.strata] / self.sizes[self.strata]
+
+    def __len__(self):
+        return len(self.df)
+
+    def _margin(self, values):
+        """
+        Calculates the 95% error bound of an estimated total from linearized values of sampled rows.
+
+        Parameters:
+        - values (np.ndarray): Value of every sampled row.
+
+        :return: float: Half width of the 95% confidence interval.
+        """
+        variances = pd.Series(values).groupby(self.strata).var(ddof=1).fillna(0)
+        population = self.population[variances.index]
+        sizes = self.sizes[variances.index]
+        # Stratified variance with finite population correction
+        variance = np.sum(population ** 2 * (1 - sizes / population) * variances.to_numpy() / sizes)
+        return CONFIDENCE_Z * np.sqrt(variance)
+
+    def group_margins(self, strata, groups, group_count, values):
+        """
+        Calculates 95% error bounds of estimated totals of many groups at once, i.e. of every day of a time series or
+        every cell of a heatmap. Rows outside a group count as zeros of its stratum, so the result equals _margin()
+        of every group without scanning the sample once per group.
+
+        Parameters:
+        - strata (np.ndarray): Stratum of every sampled row in the slice.
+        - groups (np.ndarray): Group code of every sampled row in the slice, from 0 to group_count - 1.
+        - group_count (int): Number of groups.
+        - values (np.ndarray): Linearized value of every sampled row in the slice (i.e. 1 for counts).
+
+        :return: np.ndarray: Half width of the 95% confidence interval of every group.
+        """
+        keys = np.asarray(strata, dtype=np.int64) * group_count + groups
+        size = len(self.population) * group_count
+        values = np.asarray(values, dtype=float)
+        sums = np.bincount(keys, weights=values, minlength=size).reshape(-1, group_count)
+        squares = np.bincount(keys, weights=values ** 2, minlength=size).reshape(-1, group_count)
+        population = self.population[:, None].astype(float)
+        sizes = self.sizes[:, None].astype(float)
+        # Sample variance of every stratum from sums of values and squared values
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variances = np.where(sizes > 1, (squares - sums ** 2 / sizes) / (sizes - 1), 0)
+        variance = np.sum(population ** 2 * (1 - sizes / population) * np.maximum(variances, 0) / sizes, axis=0)
+        return CONFIDENCE_Z * np.sqrt(variance)
+
+    def bootstrap_margins(self, statistic, positions=None, replicates=BOOTSTRAP_REPLICATES):
+        """
+        Calculates 95% error bounds of a statistic without a closed-form variance (i.e. a percentile). Sampled rows
+        are drawn again with replacement within every stratum and the statistic is recalculated on every replicate.
+
+        Parameters:
+        - statistic: Function taking positions of sampled rows (with repeats) and returning an array of values.
+        - positions (np.ndarray or None): Positions of the sampled rows in the slice. None selects all rows.
+        - replicates (int): Number of bootstrap replicates. Default is BOOTSTRAP_REPLICATES.
+
+        :return: np.ndarray: Half width of the 95% confidence interval of every value returned by the statistic.
+        """
+        domain = self.domain_mask(positions)
+        rng = np.random.default_rng(self.random_state)
+        order = np.argsort(self.strata, kind='stable')
+        strata = self.strata[order]
+        counts = np.bincount(strata, minlength=len(self.population))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        results = []
+        for _ in range(replicates):
+            # Every slot of a stratum is filled by a random row of the same stratum
+            draws = order[starts[strata] + (rng.random(len(strata)) * counts[strata]).astype(np.int64)]
+            results.append(statistic(draws[domain[draws]]))
+        return CONFIDENCE_Z * np.nanstd(np.asarray(results, dtype=float), axis=0, ddof=1)
+
+    def domain_mask(self, positions=None):
+        """
+        Converts row positions of a slice of the sample to a mask over all sampled rows.
+
+        Parameters:
+        - positions (np.ndarray or None): Positions of the sampled rows in the slice. None selects all rows.
+
+        :return: np.ndarray: Boolean mask of sampled rows in the slice.
+        """
+        if positions is None:
+            return np.ones(len(self.df), dtype=bool)
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def estimate_count(self, positions=None):
+        """
+        Estimates the number of rows of the full DataFrame that fall in a slice of the sample.
+
+        Parameters:
+        - positions (np.ndarray or None): Positions of the sampled rows in the slice. None selects all rows.
+
+        :return: tuple(float, float): Estimated row count and its 95% error bound.
+        """
+        domain = self.domain_mask(positions).astype(float)
+        return float(np.sum(self.weights * domain)), float(self._margin(domain))
+
+    def estimate_null_counts(self):
+        """
+        Estimates the number of empty values in every column of the full DataFrame.
+
+        :return: pd.DataFrame: Columns 'estimate' and 'margin' indexed by column name.
+        """
+        nulls = self.df.isnull()
+        rows = []
+        for column in self.df.columns:
+            values = nulls[column].to_numpy(dtype=float)
+            rows.append((np.sum(self.weights * values), self._margin(values)))
+        return pd.DataFrame(rows, index=self.df.columns, columns=['estimate', 'margin'])
+
+    def estimate_shares(self, column, positions=None):
+        """
+        Estimates the share of every value of a column in the full DataFrame or in a slice of it.
+
+        Parameters:
+        - column (str): The column to estimate shares for.
+        - positions (np.ndarray or None): Positions of the sampled rows in the slice. None selects all rows.
+
+        :return: pd.DataFrame: Columns 'estimate' and 'margin' indexed by column value, sorted by estimate.
+        """
+        domain = self.domain_mask(positions).astype(float)
+        domain_total = np.sum(self.weights * domain)
+        values = self.df[column].to_numpy()
+        rows = {}
+        for value in pd.unique(values[domain > 0]):
+            matches = (values == value) * domain
+            share = np.sum(self.weights * matches) / domain_total
+            # Linearized values of the ratio estimator
+            rows[value] = (share, self._margin((matches - share * domain) / domain_total))
+        shares = pd.DataFrame.from_dict(rows, orient='index', columns=['estimate', 'margin'])
+        return shares.sort_values('estimate', ascending=False)
@@ -0,0 +1,367 @@
+"""
+File contains classes that are responsible for:
+- Approximating quantiles of a numeric column in one pass (QuantileSketch)
+- Counting values in fixed width bins for histograms (HistogramSketch)
+- Building amount and distance distributions of fraud and non-fraud transactions (DistributionSketches)
+- Calculating 95% error bounds of percentiles estimated from a stratified sample (percentile_margins)
+
+All sketches are built chunk by chunk, can be merged across chunks or files and converted to a dict for saving.
+"""
+
+import numpy as np
+import pandas as pd
+from methods_data_formatting import coordinate_distances
+from methods_templates import load_template
+
+# Metrics of the distribution charts and bin width of their histograms
+METRICS = {'amt': 'Amount, EUR', 'distance': 'Distance, km'}
+BIN_WIDTHS = {'amt': 10.0, 'distance': 5.0}
+GROUPS = ('Non-fraud', 'Fraud')
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch in the style of t-digest.
+
+    Values are kept as weighted centroids. Centroids are small near the minimum and maximum and large in the middle,
+    so tail quantiles such as p95 and p99 stay accurate while memory is bounded by the compression parameter.
+    """
+
+    def __init__(self, compression=200):
+        """
+        Initializes an empty QuantileSketch.
+
+        Parameters:
+        - compression (int): Controls accuracy and size, the sketch keeps about compression / 2 centroids.
+        """
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values, weights=None):
+        """
+        Adds values to the sketch.
+
+        Parameters:
+        - values (np.ndarray): Numeric values, NaN values are skipped.
+        - weights (np.ndarray): Weight of every value (i.e. sample weights). Default is 1 for every value.
+        """
+        values = np.asarray(values, dtype=float)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+        valid = ~np.isnan(values)
+        values, weights = values[valid], weights[valid]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(np.concatenate((self.means, values)), np.concatenate((self.weights, weights)))
+
+    def merge(self, other):
+        """
+        Adds all values summarized by another sketch.
+
+        Parameters:
+        - other (QuantileSketch): The sketch to merge into this one.
+        """
+        if len(other.means) == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate((self.means, other.means)), np.concatenate((self.weights, other.weights)))
+
+    def _compress(self, means, weights):
+        """
+        Groups sorted centroids so that every group covers at most one unit of the t-digest scale function.
+        """
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        quantiles = (cumulative - weights / 2) / cumulative[-1]
+        scale = self.compression / (2 * np.pi) * np.arcsin(2 * quantiles - 1)
+        groups = np.floor(scale - scale.min()).astype(np.int64)
+        group_weights = np.bincount(groups, weights=weights)
+        group_sums = np.bincount(groups, weights=weights * means)
+        used = group_weights > 0
+        self.weights = group_weights[used]
+        self.means = group_sums[used] / self.weights
+
+    def quantile(self, q):
+        """
+        Estimates a quantile of the added values.
+
+        Parameters:
+        - q (float or np.ndarray): Quantile between 0 and 1, i.e. 0.95 for p95.
+
+        :return: float or np.ndarray: Estimated value, NaN if the sketch is empty.
+        """
+        if len(self.means) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        # Centroid means are placed at the middle of their weight and interpolated in between
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate(([0], centers, [self.count]))
+        values = np.concatenate(([self.min], self.means, [self.max]))
+        return np.interp(np.asarray(q) * self.count, positions, values)
+
+    def box_stats(self, label):
+        """
+        Creates box plot statistics for matplotlib Axes.bxp() from the sketch.
+
+        Parameters:
+        - label (str): Label of the box.
+
+        :return: dict: Median, quartiles and whiskers at 1.5 interquartile range limited by the minimum and maximum.
+        """
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        return {'label': label, 'med': median, 'q1': q1, 'q3': q3, 'fliers': [],
+                'whislo': max(self.min, q1 - 1.5 * iqr), 'whishi': min(self.max, q3 + 1.5 * iqr)}
+
+    def to_dict(self):
+        return {'compression': self.compression, 'means': self.means.tolist(), 'weights': self.weights.tolist(),
+                'min': float(self.min), 'max': float(self.max)}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['compression'])
+        sketch.means = np.asarray(data['means'], dtype=float)
+        sketch.weights = np.asarray(data['weights'], dtype=float)
+        sketch.min, sketch.max = data['min'], data['max']
+        return sketch
+
+
+class HistogramSketch:
+    """
+    Mergeable histogram with fixed width bins. Only bins holding values are stored, so range does not need to be
+    known in advance.
+    """
+
+    def __init__(self, bin_width):
+        """
+        Initializes an empty HistogramSketch.
+
+        Parameters:
+        - bin_width (float): Width of every bin. Sketches can be merged only with equal bin width.
+        """
+        self.bin_width = bin_width
+        self.bins = {}
+
+    def update(self, values, weights=None):
+        """
+        Adds values to the histogram.
+
+        Parameters:
+        - values (np.ndarray): Numeric values, NaN values are skipped.
+        - weights (np.ndarray): Weight of every value (i.e. sample weights). Default is 1 for every value.
+        """
+        values = np.asarray(values, dtype=float)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+        valid = ~np.isnan(values)
+        bins, codes = np.unique(np.floor(values[valid] / self.bin_width).astype(np.int64), return_inverse=True)
+        counts = np.bincount(codes, weights=weights[valid], minlength=len(bins))
+        for bin_number, count in zip(bins.tolist(), counts.tolist()):
+            self.bins[bin_number] = self.bins.get(bin_number, 0.0) + count
+
+    def merge(self, other):
+        """
+        Adds all counts of another histogram.
+
+        Parameters:
+        - other (HistogramSketch): The histogram to merge into this one.
+        """
+        if other.bin_width != self.bin_width:
+            raise ValueError("Histograms with different bin widths cannot be merged.")
+        for bin_number, count in other.bins.items():
+            self.bins[bin_number] = self.bins.get(bin_number, 0.0) + count
+
+    def histogram(self, upper=None, max_bins=100):
+        """
+        Returns bin edges and counts for plotting, joining neighbouring bins when there are too many of them.
+
+        Parameters:
+        - upper (float): Values above it are not shown, i.e. p99 to cut off long tails. None shows all bins.
+        - max_bins (int): Maximal number of bars. Default is 100.
+
+        :return: tuple(np.ndarray, np.ndarray, float): Left edges of bins, their counts and width of a bin.
+        """
+        if not self.bins:
+            return np.empty(0), np.empty(0), self.bin_width
+        bins = np.array(sorted(self.bins), dtype=np.int64)
+        counts = np.array([self.bins[bin_number] for bin_number in bins])
+        if upper is not None:
+            shown = bins * self.bin_width <= upper
+            bins, counts = bins[shown], counts[shown]
+        factor = max(1, int(np.ceil((bins.max() - bins.min() + 1) / max_bins))) if len(bins) else 1
+        joined, codes = np.unique(bins // factor, return_inverse=True)
+        return joined * factor * self.bin_width, np.bincount(codes, weights=counts), factor * self.bin_width
+
+    def to_dict(self):
+        return {'bin_width': self.bin_width, 'bins': {str(key): value for key, value in self.bins.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['bin_width'])
+        sketch.bins = {int(key): value for key, value in data['bins'].items()}
+        return sketch
+
+
+def distribution_values(df, template=None):
+    """
+    Extracts fraud flag and values of every metric of the distribution charts from a chunk of the master dataset.
+
+    Parameters:
+    - df (pd.DataFrame): Chunk containing the fraud and amount columns of the dataset template and either its
+      coordinate columns or a 'Distance, km' column.
+    - template (DatasetTemplate): Template of the dataset. Default is the Kaggle fraud transactions template.
+
+    :return: tuple(np.ndarray, dict): Boolean fraud flag of every row and values of every available metric.
+    """
+    template = template or load_template()
+    fraud_column, amount_column = template.column('fraud'), template.column('amount')
+    coordinate_columns = [template.column(role) for role in
+                          ('person_lat', 'person_long', 'merchant_lat', 'merchant_long')]
+    if fraud_column not in df.columns:
+        raise ValueError(f"'{fraud_column}' column not found in the DataFrame.")
+    fraud = df[fraud_column].astype(str).to_numpy() == '1'
+    metric_values = {}
+    if amount_column in df.columns:
+        metric_values['amt'] = pd.to_numeric(df[amount_column], errors='coerce').to_numpy(dtype=float)
+    if 'Distance, km' in df.columns:
+        metric_values['distance'] = pd.to_numeric(df['Distance, km'], errors='coerce').to_numpy(dtype=float)
+    elif set(coordinate_columns).issubset(df.columns):
+        metric_values['distance'] = coordinate_distances(df, template)
+    return fraud, metric_values
+
+
+class DistributionSketches:
+    """
+    Quantile and histogram sketches of transaction amount and distance, split by fraud and non-fraud transactions.
+    """
+
+    def __init__(self, compression=200):
+        """
+        Initializes empty sketches for every metric and group.
+
+        Parameters:
+        - compression (int): Compression of quantile sketches. Default is 200.
+        """
+        self.quantiles = {(metric, group): QuantileSketch(compression) for metric in METRICS for group in GROUPS}
+        self.histograms = {(metric, group): HistogramSketch(BIN_WIDTHS[metric]) for metric in METRICS
+                           for group in GROUPS}
+
+    def update(self, df, weights=None, template=None):
+        """
+        Adds a chunk of the master dataset to the sketches in one pass.
+
+        Parameters:
+        - df (pd.DataFrame): Chunk containing the fraud and amount columns of the dataset template and either its
+          coordinate columns or a 'Distance, km' column.
+        - weights (np.ndarray): Weight of every row (i.e. sample weights). Default is 1 for every row.
+        - template (DatasetTemplate): Template of the dataset. Default is the Kaggle fraud transactions template.
+        """
+        fraud, metric_values = distribution_values(df, template)
+        weights = np.ones(len(df)) if weights is None else np.asarray(weights, dtype=float)
+        for metric, values in metric_values.items():
+            for group, rows in zip(GROUPS, (~fraud, fraud)):
+                self.quantiles[(metric, group)].update(values[rows], weights[rows])
+                self.histograms[(metric, group)].update(values[rows], weights[rows])
+
+    def merge(self, other):
+        """
+        Adds all values summarized by other DistributionSketches, i.e. built from another chunk or file.
+
+        Parameters:
+        - other (DistributionSketches): The sketches to merge into these ones.
+        """
+        for key, sketch in other.quantiles.items():
+            self.quantiles[key].merge(sketch)
+        for key, sketch in other.histograms.items():
+            self.histograms[key].merge(sketch)
+
+    def percentiles(self, metric):
+        """
+        Returns p50, p95 and p99 of a metric for fraud and non-fraud transactions.
+
+        Parameters:
+        - metric (str): 'amt' or 'distance'.
+
+        :return: pd.DataFrame: Percentiles as rows and groups as columns.
+        """
+        return pd.DataFrame({group: self.quantiles[(metric, group)].quantile(PERCENTILES) for group in GROUPS},
+                            index=[f'p{round(q * 100)}' for q in PERCENTILES])
+
+    def to_dict(self):
+        return {'quantiles': {f'{metric}|{group}': sketch.to_dict() for (metric, group), sketch
+                              in self.quantiles.items()},
+                'histograms': {f'{metric}|{group}': sketch.to_dict() for (metric, group), sketch
+                               in self.histograms.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketches = cls()
+        sketches.quantiles = {tuple(key.split('|')): QuantileSketch.from_dict(value)
+                              for key, value in data['quantiles'].items()}
+        sketches.histograms = {tuple(key.split('|')): HistogramSketch.from_dict(value)
+                               for key, value in data['histograms'].items()}
+        return sketches
+
+
+def sketch_chunks(chunks, template=None):
+    """
+    Builds DistributionSketches from chunks of the master dataset, so the whole dataset is never held in memory.
+
+    Parameters:
+    - chunks: Iterable of DataFrames, i.e. chunks of one or several files.
+    - template (DatasetTemplate): Template of the dataset. Default is the Kaggle fraud transactions template.
+
+    :return: DistributionSketches: Sketches of all chunks.
+    """
+    sketches = DistributionSketches()
+    for chunk in chunks:
+        sketches.update(chunk, template=template)
+    return sketches
+
+
+def percentile_margins(sample, positions=None):
+    """
+    Calculates 95% error bounds of p50, p95 and p99 of every metric estimated from a stratified sample. Sampled rows
+    are drawn again within strata, every replicate weights the presorted values of a group by how many times each row
+    was drawn, so values are sorted only once.
+
+    Parameters:
+    - sample (StratifiedSample): The sample the slice was drawn from.
+    - positions (np.ndarray or None): Positions of the sampled rows in the slice. None selects all rows.
+
+    :return: dict: Error bounds of every metric as pd.DataFrame with percentiles as rows and groups as columns.
+    """
+    fraud, metric_values = distribution_values(sample.df, sample.template)
+    targets = np.asarray(PERCENTILES)
+    orders = {}
+    for metric, values in metric_values.items():
+        for group, rows in zip(GROUPS, (~fraud, fraud)):
+            valid = np.flatnonzero(rows & ~np.isnan(values))
+            orders[(metric, group)] = valid[np.argsort(values[valid], kind='stable')]
+
+    def statistic(draws):
+        counts = np.bincount(draws, minlength=len(sample))
+        result = []
+        for (metric, group), order in orders.items():
+            cumulative = np.cumsum(sample.weights[order] * counts[order])
+            if len(order) == 0 or cumulative[-1] == 0:
+                result.extend([np.nan] * len(targets))
+                continue
+            found = np.minimum(np.searchsorted(cumulative, targets * cumulative[-1]), len(order) - 1)
+            result.extend(metric_values[metric][order[found]])
+        return np.asarray(result)
+
+    margins = sample.bootstrap_margins(statistic, positions).reshape(len(orders), len(targets))
+    index = [f'p{round(q * 100)}' for q in PERCENTILES]
+    return {metric: pd.DataFrame({group: margins[i] for i, (key_metric, group) in enumerate(orders)
+                                  if key_metric == metric}, index=index)
+            for metric in metric_values}
@@ -0,0 +1,209 @@
+"""
+File contains classes and functions that are responsible for:
+- Loading dataset templates that declare columns, dtypes, renames, drops and roles of key fields (load_template)
+- Compiling a template to a stage that validates and converts an uploaded file in one pass (TemplateStage)
+"""
+
+import json
+import os
+import pandas as pd
+
+TEMPLATE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+DEFAULT_TEMPLATE = os.path.join(TEMPLATE_DIRECTORY, 'kaggle_fraud_transactions.json')
+DTYPES = ('string', 'integer', 'float', 'datetime')
+# Text format of datetime columns declared without a format, they are parsed as ISO 8601
+DEFAULT_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Number of problems listed in a validation error message
+MAX_REPORTED_PROBLEMS = 10
+
+_loaded_templates = {}
+
+
+def convert_string(values):
+    """
+    Converts values to text, empty values are kept empty.
+    """
+    return values.where(values.isna(), values.astype(str))
+
+
+def convert_number(values):
+    """
+    Converts values to float numbers, NaN where the value is not a number.
+    """
+    return pd.to_numeric(values, errors='coerce').astype(float)
+
+
+def convert_integer(values):
+    """
+    Converts values to nullable integers, empty where the value is not a whole number.
+    """
+    numbers = convert_number(values)
+    return numbers.where(numbers % 1 == 0).astype('Int64')
+
+
+def datetime_converter(date_format):
+    """
+    Returns a function converting values to datetime64 with the given format, NaT where the value does not match.
+    """
+    return lambda values: pd.to_datetime(values, format=date_format, errors='coerce')
+
+
+class TemplateStage:
+    """
+    Validation and mapping stage compiled from a DatasetTemplate.
+
+    Converters of every column are resolved when the stage is compiled. Applying the stage converts every column once
+    with vectorized pandas functions and collects all mismatches, so a file not matching the template is rejected at
+    load time with a single error listing the problems.
+    """
+
+    def __init__(self, template):
+        """
+        Compiles the TemplateStage.
+
+        Parameters:
+        - template (DatasetTemplate): The template to compile.
+        """
+        self.name = template.name
+        self.required = [column['name'] for column in template.columns if column.get('required', True)]
+        self.converters = []
+        for column in template.columns:
+            dtype = column.get('dtype', 'string')
+            if dtype == 'string':
+                converter = convert_string
+            elif dtype == 'integer':
+                converter = convert_integer
+            elif dtype == 'float':
+                converter = convert_number
+            else:
+                converter = datetime_converter(column.get('format', 'ISO8601'))
+            allowed = set(column['values']) if 'values' in column else None
+            self.converters.append((column['name'], dtype, converter, allowed))
+
+    def apply(self, df):
+        """
+        Validates the DataFrame and converts its columns to the dtypes declared in the template.
+
+        Parameters:
+        - df (pd.DataFrame): The DataFrame read from the uploaded file. Columns not declared in the template are kept
+          unchanged.
+
+        :return: pd.DataFrame: The converted DataFrame.
+        """
+        problems = [f"Column '{name}' not found in the file." for name in self.required if name not in df.columns]
+        converted = {}
+        for name, dtype, converter, allowed in self.converters:
+            if name not in df.columns:
+                continue
+            values = df[name]
+            result = converter(values)
+            if allowed is not None:
+                invalid = values.notna() & ~result.isin(allowed)
+                expected = 'one of ' + ', '.join(sorted(allowed))
+            else:
+                invalid = values.notna() & result.isna()
+                expected = dtype
+            invalid_count = int(invalid.sum())
+            if invalid_count:
+                example = values[invalid].iloc[0]
+                problems.append(f"Column '{name}' has {invalid_count} values that are not {expected}, "
+                                f"i.e. '{example}'.")
+            converted[name] = result
+
+        if problems:
+            listed = problems[:MAX_REPORTED_PROBLEMS]
+            if len(problems) > len(listed):
+                listed.append(f"... and {len(problems) - len(listed)} more problems.")
+            raise ValueError(f"File does not match template '{self.name}':\n" + '\n'.join(listed))
+        return pd.DataFrame({name: converted.get(name, df[name]) for name in df.columns}, index=df.index)
+
+
+class DatasetTemplate:
+    """
+    Layout of a dataset: its columns and their dtypes, columns dropped and renamed by data cleaning and the roles of
+    key fields (i.e. card number, timestamp, coordinates) used by cleaning functions instead of hard-coded names.
+    """
+
+    def __init__(self, definition):
+        """
+        Initializes the DatasetTemplate and compiles its TemplateStage.
+
+        Parameters:
+        - definition (dict): Template definition with keys 'name', 'columns', 'roles', 'drops', 'renames' and
+          optional 'strip_prefixes'.
+        """
+        self.name = definition['name']
+        self.columns = definition['columns']
+        self.roles = definition.get('roles', {})
+        self.drops = definition.get('drops', [])
+        self.renames = definition.get('renames', {})
+        self.strip_prefixes = definition.get('strip_prefixes', {})
+
+        # Template mistakes are reported when it is loaded, not during cleaning
+        declared = {column['name'] for column in self.columns}
+        for column in self.columns:
+            if column.get('dtype', 'string') not in DTYPES:
+                raise ValueError(f"Template '{self.name}': unknown dtype '{column['dtype']}' of column "
+                                 f"'{column['name']}'.")
+        referenced = (list(self.roles.values()) + list(self.drops) + list(self.renames)
+                      + list(self.strip_prefixes))
+        undeclared = sorted(set(referenced) - declared)
+        if undeclared:
+            raise ValueError(f"Template '{self.name}' refers to undeclared columns: {', '.join(undeclared)}.")
+        self.stage = TemplateStage(self)
+
+    def column(self, role):
+        """
+        Returns the name of the column holding a key field.
+
+        Parameters:
+        - role (str): Role of the field, i.e. 'card_number', 'timestamp' or 'person_lat'.
+
+        :return: str: Column name.
+        """
+        if role not in self.roles:
+            raise ValueError(f"Template '{self.name}' does not declare a '{role}' column.")
+        return self.roles[role]
+
+    def date_formats(self):
+        """
+        Returns text formats of datetime columns, used to write converted dates back as they were in the file.
+
+        :return: dict: strftime formats keyed by column name.
+        """
+        formats = {}
+        for column in self.columns:
+            if column.get('dtype') == 'datetime':
+                date_format = column.get('format', 'ISO8601')
+                formats[column['name']] = DEFAULT_DATETIME_FORMAT if date_format == 'ISO8601' else date_format
+        return formats
+
+
+def load_template(file_path=DEFAULT_TEMPLATE):
+    """
+    Loads a template definition file. Templates are compiled once and cached by path.
+
+    Parameters:
+    - file_path (str): Path of the .json template file. Default is the bundled Kaggle fraud transactions template.
+
+    :return: DatasetTemplate: The compiled template.
+    """
+    file_path = os.path.abspath(file_path)
+    if file_path not in _loaded_templates:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            _loaded_templates[file_path] = DatasetTemplate(json.load(file))
+    return _loaded_templates[file_path]
+
+
+def available_templates():
+    """
+    Loads every template in the templates directory.
+
+    :return: dict: DatasetTemplates keyed by their names.
+    """
+    templates = {}
+    for file_name in sorted(os.listdir(TEMPLATE_DIRECTORY)):
+        if file_name.endswith('.json'):
+            template = load_template(os.path.join(TEMPLATE_DIRECTORY, file_name))
+            templates[template.name] = template
+    return templates
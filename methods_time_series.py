@@ -0,0 +1,225 @@
+"""
+File contains functions and classes that are responsible for:
+- Parsing transaction date and time values to datetime64 (parse_timestamps)
+- Pre-bucketing transactions to per-hour aggregates and rolling them up to days, weeks and months (TimeSeriesAggregates)
+- Calculating 95% error bounds of aggregates estimated from a stratified sample
+- Reducing number of points of long line charts (downsample_minmax)
+"""
+
+import numpy as np
+import pandas as pd
+
+METRICS = {'volume': 'Transactions', 'fraud_rate': 'Fraud rate', 'amount': 'Amount, EUR'}
+RESOLUTIONS = ('Hour', 'Day', 'Week', 'Month')
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def parse_timestamps(values):
+    """
+    Parses date and time values such as '2019-01-01 00:00:18' to datetime64.
+
+    Parameters:
+    - values (pd.Series): Date and time values as text.
+
+    :return: np.ndarray: datetime64[ns] values, NaT where the value cannot be parsed.
+    """
+    return pd.to_datetime(values, format='ISO8601', errors='coerce').to_numpy(dtype='datetime64[ns]')
+
+
+class TimeSeriesAggregates:
+    """
+    Transaction count, fraud count and amount of every hour between the first and the last transaction.
+
+    Rows are scanned once when the aggregates are built. Day, week, month, hour of day and weekday statistics are
+    rolled up from the compact per-hour arrays. When the rows are a stratified sample, their stratum and hour are kept
+    as well, so 95% error bounds can be calculated at any resolution.
+    """
+
+    def __init__(self, timestamps, amounts, fraud, weights=None, strata=None):
+        """
+        Initializes the TimeSeriesAggregates.
+
+        Parameters:
+        - timestamps (np.ndarray): datetime64 value of every transaction.
+        - amounts (np.ndarray): Amount of every transaction.
+        - fraud (np.ndarray): Boolean fraud flag of every transaction.
+        - weights (np.ndarray): Weight of every transaction (i.e. sample weights). Default is 1 for every row.
+        - strata (np.ndarray): Stratum of every transaction of a stratified sample. Default is None, no error bounds.
+        """
+        weights = np.ones(len(timestamps)) if weights is None else np.asarray(weights, dtype=float)
+        valid = ~np.isnat(timestamps)
+        timestamps, weights = timestamps[valid], weights[valid]
+        amounts = np.nan_to_num(np.asarray(amounts, dtype=float)[valid])
+        fraud = np.asarray(fraud, dtype=bool)[valid]
+
+        days = timestamps.astype('datetime64[D]')
+        self.first_day = days.min() if len(days) else np.datetime64('1970-01-01', 'D')
+        day_offsets = (days - self.first_day).astype(np.int64)
+        hours = ((timestamps - days) // np.timedelta64(1, 'h')).astype(np.int64)
+        self.day_count = int(day_offsets.max()) + 1 if len(days) else 0
+
+        cells = day_offsets * 24 + hours
+        shape = (self.day_count, 24)
+        size = self.day_count * 24
+        self.volume = np.bincount(cells, weights=weights, minlength=size).reshape(shape)
+        self.fraud = np.bincount(cells, weights=weights * fraud, minlength=size).reshape(shape)
+        self.amount = np.bincount(cells, weights=weights * amounts, minlength=size).reshape(shape)
+
+        # Rows of a sample are few, they are kept for error bounds
+        self.rows = None
+        if strata is not None:
+            self.rows = {'strata': np.asarray(strata)[valid], 'cells': cells, 'amounts': amounts, 'fraud': fraud}
+
+    @property
+    def days(self):
+        return self.first_day + np.arange(self.day_count)
+
+    @staticmethod
+    def _metric(metric, volume, fraud, amount):
+        """
+        Calculates a metric from rolled up arrays, fraud rate is left empty where there are no transactions.
+        """
+        if metric == 'volume':
+            return volume
+        if metric == 'amount':
+            return amount
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(volume > 0, fraud / volume, np.nan)
+
+    def _periods(self, resolution):
+        """
+        Maps every hour cell to a period of the resolution.
+
+        Parameters:
+        - resolution (str): 'Hour', 'Day', 'Week', 'Month', 'Hour of day' or 'Weekday hour'.
+
+        :return: tuple(np.ndarray, np.ndarray): Period code of every hour cell and the start of every period
+        (hour, weekday and hour codes for 'Hour of day' and 'Weekday hour').
+        """
+        days = self.days
+        cells = np.arange(self.day_count * 24)
+        if resolution == 'Hour':
+            return cells, (days.astype('datetime64[h]')[:, None] + np.arange(24)).ravel()
+        if resolution == 'Day':
+            return cells // 24, days
+        if resolution == 'Hour of day':
+            return cells % 24, np.arange(24)
+        # Weeks start on Monday, 1970-01-01 was Thursday
+        weekdays = (days.astype(np.int64) + 3) % 7
+        if resolution == 'Weekday hour':
+            return weekdays[cells // 24] * 24 + cells % 24, np.arange(7 * 24)
+        if resolution == 'Week':
+            periods = (days - weekdays).astype('datetime64[D]')
+        elif resolution == 'Month':
+            periods = days.astype('datetime64[M]')
+        else:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        groups, starts = pd.factorize(periods)
+        return groups[cells // 24], np.asarray(starts).astype('datetime64[D]')
+
+    def _roll_up(self, resolution):
+        """
+        Sums hourly aggregates into periods of the resolution.
+
+        :return: tuple: Period starts and rolled up volume, fraud and amount arrays.
+        """
+        periods, starts = self._periods(resolution)
+        return (starts, *(np.bincount(periods, weights=array.ravel(), minlength=len(starts))
+                          for array in (self.volume, self.fraud, self.amount)))
+
+    def series(self, metric, resolution):
+        """
+        Returns a time series of a metric at the given resolution.
+
+        Parameters:
+        - metric (str): 'volume', 'fraud_rate' or 'amount'.
+        - resolution (str): 'Hour', 'Day', 'Week' or 'Month'.
+
+        :return: tuple(np.ndarray, np.ndarray): datetime64 start of every period and the metric value.
+        """
+        starts, volume, fraud, amount = self._roll_up(resolution)
+        return starts, self._metric(metric, volume, fraud, amount)
+
+    def hour_of_day(self, metric):
+        """
+        Returns a metric of every hour of day, summed over all days.
+
+        Parameters:
+        - metric (str): 'volume', 'fraud_rate' or 'amount'.
+
+        :return: np.ndarray: 24 values, one per hour.
+        """
+        return self.series(metric, 'Hour of day')[1]
+
+    def weekday_hour(self, metric):
+        """
+        Returns a metric of every hour of every weekday, summed over all weeks.
+
+        Parameters:
+        - metric (str): 'volume', 'fraud_rate' or 'amount'.
+
+        :return: np.ndarray: 7 x 24 matrix, rows are weekdays starting on Monday.
+        """
+        return self.series(metric, 'Weekday hour')[1].reshape(7, 24)
+
+    def margins(self, metric, resolution, sample):
+        """
+        Returns 95% error bounds of a metric estimated from a stratified sample.
+
+        Parameters:
+        - metric (str): 'volume', 'fraud_rate' or 'amount'.
+        - resolution (str): 'Hour', 'Day', 'Week', 'Month', 'Hour of day' or 'Weekday hour'.
+        - sample (StratifiedSample): The sample the rows were drawn from.
+
+        :return: np.ndarray: Error bound of every period, in the same order as series() values.
+        """
+        if self.rows is None:
+            raise ValueError("Error bounds are available only for aggregates of a stratified sample.")
+        periods, starts = self._periods(resolution)
+        _, volume, fraud, amount = self._roll_up(resolution)
+        groups = periods[self.rows['cells']]
+        if metric == 'volume':
+            values = np.ones(len(groups))
+        elif metric == 'amount':
+            values = self.rows['amounts']
+        else:
+            # Linearized values of the fraud rate ratio estimator
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rate = np.where(volume > 0, fraud / volume, 0)
+                values = (self.rows['fraud'] - rate[groups]) / volume[groups]
+        margins = sample.group_margins(self.rows['strata'], groups, len(starts), values)
+        if metric == 'fraud_rate':
+            margins = np.where(volume > 0, margins, np.nan)
+        return margins
+
+
+def downsample_minmax(x, y, *others, max_points=2000):
+    """
+    Reduces the number of points of a line chart, keeping the minimum and maximum of every bucket so that peaks stay
+    visible.
+
+    Parameters:
+    - x (np.ndarray): X values in ascending order.
+    - y (np.ndarray): Y values.
+    - others (np.ndarray): Other arrays of the same length downsampled at the same points (i.e. error bounds).
+    - max_points (int): Maximal number of points returned. Default is 2000.
+
+    :return: tuple: Downsampled x, y and other arrays.
+    """
+    if len(x) <= max_points:
+        return (x, y, *others)
+    bucket_count = max_points // 2
+    bucket_size = int(np.ceil(len(y) / bucket_count))
+    padded = np.full(bucket_count * bucket_size, np.nan)
+    padded[:len(y)] = y
+    buckets = padded.reshape(bucket_count, bucket_size)
+    # Empty values are skipped, buckets without values point to their first element
+    offsets = np.arange(bucket_count) * bucket_size
+    filled = ~np.isnan(buckets).all(axis=1)
+    minimums = offsets.copy()
+    maximums = offsets.copy()
+    minimums[filled] += np.nanargmin(buckets[filled], axis=1)
+    maximums[filled] += np.nanargmax(buckets[filled], axis=1)
+    positions = np.unique(np.concatenate((minimums, maximums)))
+    positions = positions[positions < len(y)]
+    return (x[positions], y[positions], *(array[positions] for array in others))
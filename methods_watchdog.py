@@ -0,0 +1,162 @@
+"""
+File contains classes and functions that are responsible for:
+- Measuring how late the Tkinter event loop runs a periodic heartbeat (UIStallWatchdog)
+- Attributing event loop freezes to the function blocking the GUI thread (blocking_function)
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+
+logger = logging.getLogger(__name__)
+
+APP_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+# App files that only dispatch work, freezes are attributed to the functions they call
+UI_FILES = {'GUI.py', 'main.py', os.path.basename(__file__)}
+
+StallEvent = namedtuple('StallEvent', ['function', 'duration', 'time'])
+
+
+def qualified_name(frame):
+    """
+    Returns qualified name of the function a frame is executing, i.e. 'FigureCanvasTkAgg.draw'.
+    """
+    code = frame.f_code
+    return getattr(code, 'co_qualname', code.co_name)
+
+
+def blocking_function(frame):
+    """
+    Finds the function responsible for a freeze from the stack of the blocked thread.
+
+    Data processing functions of the app (i.e. card_type_assign) are reported directly. When the innermost app frame is
+    GUI code, the library function it called is reported instead (i.e. FigureCanvasTkAgg.draw).
+
+    Parameters:
+    - frame: Innermost frame of the blocked thread.
+
+    :return: str: Qualified name of the blocking function.
+    """
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    # Stack is ordered from the innermost frame outwards
+    gui_position = None
+    for position, stack_frame in enumerate(stack):
+        file_path = os.path.abspath(stack_frame.f_code.co_filename)
+        if os.path.dirname(file_path) != APP_DIRECTORY:
+            continue
+        if os.path.basename(file_path) not in UI_FILES:
+            return qualified_name(stack_frame)
+        if gui_position is None and os.path.basename(file_path) == 'GUI.py':
+            gui_position = position
+    if gui_position is not None:
+        return qualified_name(stack[max(gui_position - 1, 0)])
+    return qualified_name(stack[0])
+
+
+class UIStallWatchdog:
+    """
+    Optional watchdog of the Tkinter event loop.
+
+    The GUI thread schedules a heartbeat with after() every interval. A helper thread checks how long ago the
+    heartbeat last ran and, while the loop is blocked for longer than the threshold, samples the GUI thread stack.
+    When the late heartbeat finally runs, the freeze is logged with its duration and the most often sampled function.
+    """
+
+    def __init__(self, root, interval_ms=100, threshold_ms=500):
+        """
+        Initializes the UIStallWatchdog.
+
+        Parameters:
+        - root: Tkinter root window running the event loop.
+        - interval_ms (int): Interval of the heartbeat in milliseconds. Default is 100.
+        - threshold_ms (int): Delay of the heartbeat in milliseconds reported as a freeze. Default is 500.
+        """
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold = threshold_ms / 1000
+        self.main_thread_id = threading.main_thread().ident
+        self.events = []
+        self.samples = Counter()
+        self.lock = threading.Lock()
+        self.running = False
+        # Heartbeat and helper thread of a previous start exit when the generation changes
+        self.generation = 0
+        self.last_beat = None
+
+    def start(self):
+        """
+        Starts the heartbeat and the helper thread. Must be called from the GUI thread.
+        """
+        if self.running:
+            return
+        self.running = True
+        self.generation += 1
+        self.last_beat = time.perf_counter()
+        self.root.after(self.interval_ms, self._beat, self.generation)
+        threading.Thread(target=self._monitor, args=(self.generation,), name='ui-watchdog', daemon=True).start()
+
+    def stop(self):
+        """
+        Stops the heartbeat and the helper thread.
+        """
+        self.running = False
+
+    def _delay(self, now):
+        """
+        Returns how late the heartbeat is, in seconds.
+        """
+        return now - self.last_beat - self.interval_ms / 1000
+
+    def _beat(self, generation):
+        """
+        Heartbeat run by the event loop, records a freeze when it runs later than the threshold.
+        """
+        if not self.running or generation != self.generation:
+            return
+        now = time.perf_counter()
+        delay = self._delay(now)
+        with self.lock:
+            samples, self.samples = self.samples, Counter()
+        if delay >= self.threshold:
+            function = samples.most_common(1)[0][0] if samples else 'unknown'
+            event = StallEvent(function, delay, time.time())
+            with self.lock:
+                self.events.append(event)
+            logger.warning("GUI thread blocked for %.2f s in %s", delay, function)
+        self.last_beat = now
+        self.root.after(self.interval_ms, self._beat, generation)
+
+    def _monitor(self, generation):
+        """
+        Helper thread sampling the GUI thread stack while the heartbeat is late.
+        """
+        while self.running and generation == self.generation:
+            time.sleep(self.interval_ms / 2000)
+            if self._delay(time.perf_counter()) < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is not None:
+                function = blocking_function(frame)
+                with self.lock:
+                    self.samples[function] += 1
+
+    def summary(self):
+        """
+        Summarizes recorded freezes per blocking function.
+
+        :return: list: Tuples of (function, freeze count, total seconds, longest seconds), largest total first.
+        """
+        with self.lock:
+            events = list(self.events)
+        functions = {}
+        for event in events:
+            count, total, longest = functions.get(event.function, (0, 0.0, 0.0))
+            functions[event.function] = (count + 1, total + event.duration, max(longest, event.duration))
+        rows = [(function, *values) for function, values in functions.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)